@@ -0,0 +1,57 @@
+"""
+Compare the character splitter with the token-budgeted splitter on data/transcripts.
+
+    python benchmarks/bench_chunking.py [--repeat 3]
+
+Reports throughput and the spread of chunk sizes in tokens (the number that
+drives embedding and prompt cost).
+"""
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+import tiktoken
+
+from pipeline.parallel_chunking import build_splitter
+from pipeline.token_splitter import ENCODING_NAME
+
+TRANSCRIPTS_DIR = Path(__file__).resolve().parents[1] / "data" / "transcripts"
+CONFIGS = [
+    ("char 1000/100", "char", 1000, 100),
+    ("token 256/24", "token", 256, 24),
+]
+
+def run(splitter, texts, repeat):
+    best, chunks = float("inf"), []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chunks = [c for text in texts for c in splitter.split_text(text)]
+        best = min(best, time.perf_counter() - started)
+    return best, chunks
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = [p.read_text(encoding="utf-8") for p in sorted(TRANSCRIPTS_DIR.glob("*.txt"))]
+    megabytes = sum(len(t.encode("utf-8")) for t in texts) / 1e6
+    encoding = tiktoken.get_encoding(ENCODING_NAME)
+    print(f"📂 {len(texts)} transcripts, {megabytes:.2f} MB\n")
+
+    header = f"{'splitter':<16}{'sec':>8}{'MB/s':>8}{'chunks':>8}{'mean tok':>10}{'stdev':>8}{'cv':>7}{'min':>6}{'max':>6}"
+    print(header)
+    print("-" * len(header))
+    for label, kind, size, overlap in CONFIGS:
+        seconds, chunks = run(build_splitter(kind, size, overlap), texts, args.repeat)
+        sizes = [len(encoding.encode(c, disallowed_special=())) for c in chunks]
+        mean = statistics.mean(sizes)
+        stdev = statistics.pstdev(sizes)
+        print(f"{label:<16}{seconds:>8.3f}{megabytes / seconds:>8.2f}{len(chunks):>8}"
+              f"{mean:>10.1f}{stdev:>8.1f}{stdev / mean:>7.2f}{min(sizes):>6}{max(sizes):>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Query latency of the NumPy vector index vs Chroma on the same corpus.
+
+    python src/pipeline/export_vector_index.py          # once, builds vector_index/
+    python benchmarks/bench_vector_search.py [--queries 200 --k 8]
+    python benchmarks/bench_vector_search.py --synthetic 50000   # NumPy only, random vectors
+    python benchmarks/bench_vector_search.py --synthetic 50000 --quantize int8
+
+Stored chunk vectors are reused as queries, so no embedding calls are made.
+"""
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+from tools.vector_index import NumpyVectorIndex, recall_at_k
+from tools.vector_store import CHROMA_DIR, NUMPY_INDEX_DIR
+
+def time_queries(search, queries, k):
+    latencies, results = [], []
+    for q in queries:
+        started = time.perf_counter()
+        docs = search(q.tolist(), k=k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append({d.page_content for d in docs})
+    return np.asarray(latencies), results
+
+def report(label, latencies):
+    print(f"{label:<10} p50 {np.percentile(latencies, 50):8.3f} ms   "
+          f"p95 {np.percentile(latencies, 95):8.3f} ms   mean {latencies.mean():8.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--synthetic", type=int, default=0, help="rows of a random 1536-d index")
+    parser.add_argument("--dtype", default="float32")
+    parser.add_argument("--quantize", choices=["int8"], default=None,
+                        help="synthetic only; a real index uses its int8 codes when it has them")
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    if args.synthetic:
+        vectors = rng.normal(size=(args.synthetic, 1536)).astype(np.float32)
+        ids = [str(i) for i in range(args.synthetic)]
+        index = NumpyVectorIndex.build(tempfile.mkdtemp(), ids, vectors, ids, [{} for _ in ids],
+                                       dtype=args.dtype, quantize=args.quantize)
+    else:
+        index = NumpyVectorIndex(NUMPY_INDEX_DIR)
+
+    rows = rng.choice(len(index), size=min(args.queries, len(index)), replace=False)
+    queries = np.asarray(index.vectors[rows], dtype=np.float32)
+    print(f"📐 {len(index)} chunks x {index.vectors.shape[1]} dims ({index.vectors.dtype}), "
+          f"{len(queries)} queries, k={args.k}\n")
+
+    numpy_lat, numpy_hits = time_queries(index.similarity_search_by_vector, queries, args.k)
+    report("numpy", numpy_lat)
+
+    if index.codes is not None:
+        exact = NumpyVectorIndex(index.path, quantized=False)
+        exact_lat, _ = time_queries(exact.similarity_search_by_vector, queries, args.k)
+        report("exact", exact_lat)
+        print(f"🗜 int8 codes {index.codes.nbytes / 1e6:.1f} MB vs {index.vectors.nbytes / 1e6:.1f} MB, "
+              f"recall@{args.k} vs exact: {recall_at_k(index, queries, args.k):.3f}")
+
+    if not args.synthetic:
+        from langchain_community.vectorstores import Chroma
+        chroma = Chroma(persist_directory=CHROMA_DIR)
+        chroma_lat, chroma_hits = time_queries(chroma.similarity_search_by_vector, queries, args.k)
+        report("chroma", chroma_lat)
+        overlap = np.mean([len(a & b) / args.k for a, b in zip(numpy_hits, chroma_hits)])
+        print(f"\n⚡ speed-up (p50): {np.percentile(chroma_lat, 50) / np.percentile(numpy_lat, 50):.1f}x, "
+              f"top-{args.k} overlap with Chroma: {overlap:.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import sys, os
+# Make "src" importable when running this file directly
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+import json
+import asyncio
+import functools
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import List, Literal, Optional, Union
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ConfigDict, Field
+
+load_dotenv()
+
+# === CONFIG ===
+API_HOST = os.getenv("API_HOST", "0.0.0.0")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+# Each worker is a separate process with its own models, caches and limits
+API_WORKERS = int(os.getenv("API_WORKERS", "4"))
+# Concurrent requests per endpoint and worker: /ask holds an LLM call, /price is cheap
+ASK_CONCURRENCY = int(os.getenv("ASK_CONCURRENCY", "8"))
+PRICE_CONCURRENCY = int(os.getenv("PRICE_CONCURRENCY", "32"))
+RETRIEVE_CONCURRENCY = int(os.getenv("RETRIEVE_CONCURRENCY", "16"))
+# A request that cannot get a slot within this many seconds gets a 503
+QUEUE_TIMEOUT = float(os.getenv("API_QUEUE_TIMEOUT", "10"))
+
+
+class Coalescer:
+    """
+    Identical in-flight requests share one computation: the first caller for
+    a key starts it, later callers await the same task until it finishes.
+    The task is shielded, so a client disconnecting does not cancel the
+    answer for everyone else waiting on it.
+    """
+
+    def __init__(self):
+        self.in_flight = {}
+        self.started = self.coalesced = 0
+
+    async def run(self, key, compute):
+        task = self.in_flight.get(key)
+        if task is None:
+            self.started += 1
+            task = asyncio.ensure_future(compute())
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+
+class EndpointLimit:
+    """Per-endpoint concurrency cap; callers queue for a slot up to QUEUE_TIMEOUT."""
+
+    def __init__(self, name: str, limit: int, queue_timeout: float = QUEUE_TIMEOUT):
+        self.name = name
+        self.limit = limit
+        self.queue_timeout = queue_timeout
+        self.active = self.waiting = self.rejected = 0
+        self._semaphore = None
+
+    async def run(self, fn, *args):
+        """Run the blocking fn(*args) on the thread pool once a slot is free."""
+        if self._semaphore is None:
+            # created lazily so it binds to the worker's running event loop
+            self._semaphore = asyncio.Semaphore(self.limit)
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail=f"{self.name} is busy, retry shortly")
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        try:
+            return await run_in_threadpool(fn, *args)
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {"limit": self.limit, "active": self.active, "waiting": self.waiting, "rejected": self.rejected}
+
+# === BACKENDS ===
+# Imported on first use: /price needs neither OpenAI nor the vector store
+@functools.lru_cache(maxsize=None)
+def _handle_query():
+    from pipeline.query_chromadb import handle_query
+    return handle_query
+
+@functools.lru_cache(maxsize=None)
+def _retrieve_crypto_context():
+    from tools.rag_tool import retrieve_crypto_context
+    return retrieve_crypto_context
+
+@functools.lru_cache(maxsize=None)
+def _get_crypto_price():
+    from tools.coingecko_tool import get_crypto_price
+    return get_crypto_price
+
+def answer(query: str) -> str:
+    return _handle_query()(query)
+
+def retrieve(query: str, k: int, mode: Optional[str], filters: Optional[dict]) -> str:
+    return _retrieve_crypto_context()(query, k=k, mode=mode, filters=filters)
+
+def price(query: str) -> str:
+    return _get_crypto_price()(query)
+
+# === APP ===
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Per worker: keep the watchlist snapshot warm (MARKET_POLLER=1) before the first request."""
+    from tools.market_poller import start_market_poller_if_enabled
+    poller = start_market_poller_if_enabled()
+    yield
+    if poller is not None:
+        poller.stop()
+
+app = FastAPI(title="Crypto Trends Bot API", lifespan=lifespan)
+limits = {
+    "ask": EndpointLimit("ask", ASK_CONCURRENCY),
+    "price": EndpointLimit("price", PRICE_CONCURRENCY),
+    "retrieve": EndpointLimit("retrieve", RETRIEVE_CONCURRENCY),
+}
+coalescer = Coalescer()
+
+
+class AskRequest(BaseModel):
+    query: str
+
+
+class RetrieveFilters(BaseModel):
+    """The filters tools.metadata_index understands; typos and unparseable dates are a 422."""
+    model_config = ConfigDict(extra="forbid")
+
+    source: Optional[Union[str, List[str]]] = None
+    subreddit: Optional[Union[str, List[str]]] = None
+    coin: Optional[Union[str, List[str]]] = None
+    # ISO date/datetime or epoch seconds; naive values are UTC
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+
+
+class RetrieveRequest(BaseModel):
+    query: str
+    k: int = Field(4, ge=1, le=50)
+    # unknown modes would silently fall back to hybrid in HybridRetriever.search
+    mode: Optional[Literal["hybrid", "vector", "bm25"]] = None
+    filters: Optional[RetrieveFilters] = None
+
+
+def _require(query: str) -> str:
+    if not query or not query.strip():
+        raise HTTPException(status_code=422, detail="query must not be empty")
+    return query.strip()
+
+def _coalesce_key(query: str) -> str:
+    """
+    Whitespace-collapsed but case-preserved: coin routing is case-sensitive
+    ("ARB price" is Arbitrum, "arb price" is no coin), so questions that
+    differ only in case must not share an answer.
+    """
+    return " ".join(query.split())
+
+@app.post("/ask")
+async def ask(request: AskRequest):
+    query = _require(request.query)
+    key = ("ask", _coalesce_key(query))
+    result = await coalescer.run(key, lambda: limits["ask"].run(answer, query))
+    return {"query": query, "answer": result}
+
+@app.get("/price")
+async def get_price(q: str = Query(..., description="e.g. 'btc and eth in eur'")):
+    query = _require(q)
+    key = ("price", _coalesce_key(query))
+    result = await coalescer.run(key, lambda: limits["price"].run(price, query))
+    return {"query": query, "answer": result}
+
+@app.post("/retrieve")
+async def post_retrieve(request: RetrieveRequest):
+    query = _require(request.query)
+    # plain dict with ISO date strings, as retrieve_crypto_context takes it
+    filters = (request.filters.model_dump(mode="json", exclude_none=True) or None) if request.filters else None
+    key = ("retrieve", _coalesce_key(query), request.k, request.mode, json.dumps(filters, sort_keys=True))
+    context = await coalescer.run(
+        key, lambda: limits["retrieve"].run(retrieve, query, request.k, request.mode, filters))
+    return {"query": query, "context": context}
+
+@app.get("/health")
+async def health():
+    from tools.price_service import price_service
+    return {
+        "pid": os.getpid(),
+        "endpoints": {name: limit.stats() for name, limit in limits.items()},
+        "coalesced": coalescer.coalesced,
+        "started": coalescer.started,
+        "prices": price_service.stats(),
+    }
+
+# === RUN SERVER ===
+if __name__ == "__main__":
+    import uvicorn
+    # every worker has its own CoinGecko token bucket: split COINGECKO_RATE_PER_MIN between them
+    os.environ.setdefault("COINGECKO_RATE_SHARE", str(API_WORKERS))
+    # workers > 1 needs the import string; each worker re-imports this module
+    uvicorn.run("app.api:app", host=API_HOST, port=API_PORT, workers=API_WORKERS)
@@ -1,16 +1,23 @@
 import sys, os
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 import os
-import requests
 import gradio as gr
 from dotenv import load_dotenv
-from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain.chains import RetrievalQA
+from langchain_openai import ChatOpenAI
 
 from tools.coingecko_tool import CoinGeckoTool
 from tools.rag_tool import RagTool
 from tools.retriever_tool import RetrieverTool
+from tools.embedding_cache import get_embeddings
+from tools.vector_store import get_vectorstore
+from tools.answer_cache import QueryEmbeddingLRU, SemanticAnswerCache
+from tools.context_packer import PackedRetriever
+from tools.price_service import price_summary, price_table
+from tools.query_router import route_query
+from tools.market_poller import start_market_poller_if_enabled
+from tools.fanout import submit_branch, branch_result, stream_branch, PRICE_TIMEOUT, ANALYSIS_TIMEOUT
+from tools.streaming_qa import StreamingQA
+from tools.transcriber import get_transcriber, TranscriberBusy
 
 
 # === LOAD ENV VARIABLES ===
@@ -23,76 +30,45 @@ if not OPENAI_API_KEY:
 CHROMA_DB_DIR = r"C:\Users\nicho\Documents\crypto_bot\chroma_db"
 
 # === INIT EMBEDDINGS & DB ===
-embeddings = OpenAIEmbeddings(model="text-embedding-ada-002", api_key=OPENAI_API_KEY)
-db = Chroma(persist_directory=CHROMA_DB_DIR, embedding_function=embeddings)
-retriever = db.as_retriever(search_kwargs={"k": 8})
+embeddings = QueryEmbeddingLRU(get_embeddings("text-embedding-ada-002", api_key=OPENAI_API_KEY))
+db = get_vectorstore(embeddings, chroma_dir=CHROMA_DB_DIR)
+# 8 candidates, packed into CONTEXT_TOKEN_BUDGET tokens (same-source chunks merged, overlaps dropped)
+retriever = PackedRetriever(base=db.as_retriever(search_kwargs={"k": 8}))
 
 # === LLM ===
-llm = ChatOpenAI(model="gpt-4o", temperature=0, api_key=OPENAI_API_KEY)
-qa = RetrievalQA.from_chain_type(llm=llm, retriever=retriever, return_source_documents=True)
+# Streamed so the chat shows the answer as it is written
+llm = ChatOpenAI(model="gpt-4o", temperature=0, api_key=OPENAI_API_KEY, streaming=True)
+
+# === ANSWER CACHE ===
+answer_cache = SemanticAnswerCache()
+qa = StreamingQA(llm, retriever, embeddings, answer_cache)
+
+def stream_analysis(query: str, scope=None):
+    """Answer tokens from a pool thread as they arrive; the first coin scopes the answer cache."""
+    return stream_branch(lambda: qa.stream(query, scope), "analysis", ANALYSIS_TIMEOUT)
+
+# === PRICES ===
+def price_html(coin_ids, currencies):
+    """One coin in USD as a line, several coins or currencies as a table (one batched request)."""
+    if len(coin_ids) == 1 and currencies == ["usd"]:
+        return price_summary(coin_ids[0])
+    rows = ""
+    for row in price_table(coin_ids, currencies):
+        price = "n/a" if row["error"] else f"{row['price']:,.2f}" + (" ⚠" if row["stale"] else "")
+        change = "n/a" if row["error"] else f"{row['change_24h']:.2f}%"
+        rows += (f"<tr><td>{row['coin']}</td><td>{row['currency'].upper()}</td>"
+                 f"<td style='text-align:right'>{price}</td><td style='text-align:right'>{change}</td></tr>")
+    return ("<table><tr><th>Coin</th><th>Currency</th><th>Price</th><th>24h</th></tr>"
+            f"{rows}</table>")
 
-# === COINGECKO PRICE FETCHER ===
-def get_crypto_price(symbol: str):
-    try:
-        url = "https://api.coingecko.com/api/v3/simple/price"
-        params = {"ids": symbol.lower(), "vs_currencies": "usd", "include_24hr_change": "true"}
-        resp = requests.get(url, params=params)
-        data = resp.json()
-        if symbol.lower() in data:
-            price = data[symbol.lower()]["usd"]
-            change = data[symbol.lower()]["usd_24h_change"]
-            return f"${price:,.2f} (24h change: {change:.2f}%)"
-        return f"❌ Could not fetch price for '{symbol}'."
-    except Exception as e:
-        return f"⚠ Error fetching price: {e}"
-
-# === DETECT QUERY TYPE ===
-def detect_query_type(query: str):
-    q = query.lower()
-    price_keywords = ["price", "current", "worth", "value", "update", "today", "latest"]
-    analysis_keywords = ["say", "opinion", "think", "analysis", "view", "news", "report", "insight"]
-
-    price_asked = any(word in q for word in price_keywords)
-    analysis_asked = any(word in q for word in analysis_keywords)
-
-    coin_names = ["bitcoin", "btc", "ethereum", "eth", "solana", "sol", "cardano", "ada",
-                  "dogecoin", "doge", "xrp", "ripple", "polkadot", "dot", "litecoin", "ltc",
-                  "avalanche", "avax", "chainlink", "link", "matic", "polygon", "tron", "trx",
-                  "stellar", "xlm", "monero", "xmr"]
-    if any(coin in q for coin in coin_names) and not price_asked and not analysis_asked:
-        return "hybrid"
-
-    if price_asked and analysis_asked:
-        return "hybrid"
-    elif price_asked:
-        return "price"
-    else:
-        return "analysis"
 
 # === HANDLE QUERY WITH STYLING & CLICKABLE LINKS ===
 def handle_query(query: str):
-    query_type = detect_query_type(query)
-    tokens = {
-        "bitcoin": "bitcoin", "btc": "bitcoin",
-        "ethereum": "ethereum", "eth": "ethereum",
-        "solana": "solana", "sol": "solana",
-        "cardano": "cardano", "ada": "cardano",
-        "dogecoin": "dogecoin", "doge": "dogecoin",
-        "xrp": "ripple", "ripple": "ripple",
-        "polkadot": "polkadot", "dot": "polkadot",
-        "litecoin": "litecoin", "ltc": "litecoin",
-        "avalanche": "avalanche-2", "avax": "avalanche-2",
-        "chainlink": "chainlink", "link": "chainlink",
-        "matic": "polygon", "polygon": "polygon",
-        "tron": "tron", "trx": "tron",
-        "stellar": "stellar", "xlm": "stellar",
-        "monero": "monero", "xmr": "monero"
-    }
-    coin_symbol = None
-    for key, symbol in tokens.items():
-        if key in query.lower():
-            coin_symbol = symbol
-            break
+    # One pass over the question: intent, every coin named, quote currencies
+    route = route_query(query)
+    query_type, coin_ids, currencies = route.intent, route.coins, route.currencies
+    # The first coin scopes the answer cache
+    coin_symbol = coin_ids[0] if coin_ids else None
 
     def build_sources(source_docs):
         sources_html = ""
@@ -105,62 +81,81 @@ def handle_query(query: str):
                 sources_html += f"📄 {title}<br>"
         return sources_html
 
+    def cards(price_info=None, insight="", sources_html=None):
+        html = ""
+        if price_info is not None:
+            html += f"<div style='background-color:#d4edda; color:#155724; padding:10px; border-radius:8px;'><b>💰 Price:</b> {price_info}</div>"
+        html += f"<div style='background-color:#cce5ff; color:#004085; padding:10px; border-radius:8px; margin-top:5px;'><b>📊 Analysis:</b> {insight or '⏳'}</div>"
+        if sources_html is not None:
+            html += f"<div style='background-color:#f8f9fa; color:#383d41; padding:10px; border-radius:8px; margin-top:5px;'><b>📚 Sources:</b><br>{sources_html}</div>"
+        return html
+
     # Price only
     if query_type == "price":
-        if coin_symbol:
-            price_info = get_crypto_price(coin_symbol)
-            return f"<div style='background-color:#d4edda; color:#155724; padding:10px; border-radius:8px;'><b>💰 {coin_symbol.upper()} Price:</b> {price_info}</div>"
+        if coin_ids:
+            price_info = price_html(coin_ids, currencies)
+            label = " / ".join(c.upper() for c in coin_ids)
+            yield f"<div style='background-color:#d4edda; color:#155724; padding:10px; border-radius:8px;'><b>💰 {label} Price:</b> {price_info}</div>"
         else:
-            return "❌ Please specify a cryptocurrency for price lookup."
-
-    # Analysis only
-    if query_type == "analysis":
-        result = qa.invoke({"query": query})
-        answer = result["result"]
-        sources_html = build_sources(result["source_documents"])
-        return (
-            f"<div style='background-color:#cce5ff; color:#004085; padding:10px; border-radius:8px;'><b>📊 Analysis:</b> {answer}</div>"
-            f"<div style='background-color:#f8f9fa; color:#383d41; padding:10px; border-radius:8px; margin-top:5px;'><b>📚 Sources:</b><br>{sources_html}</div>"
-        )
-
-    # Hybrid: Price + Analysis
+            yield "❌ Please specify a cryptocurrency for price lookup."
+        return
+
+    # Analysis, or Hybrid: price card first, then analysis tokens as they stream in.
+    # Both branches start now and run side by side, each cut off by its own timeout.
+    price_info = None
     if query_type == "hybrid":
-        price_info = get_crypto_price(coin_symbol) if coin_symbol else "❌ No coin specified."
-        result = qa.invoke({"query": query})
-        insight = result["result"]
-        sources_html = build_sources(result["source_documents"])
-        return (
-            f"<div style='background-color:#d4edda; color:#155724; padding:10px; border-radius:8px;'><b>💰 Price:</b> {price_info}</div>"
-            f"<div style='background-color:#cce5ff; color:#004085; padding:10px; border-radius:8px; margin-top:5px;'><b>📊 Analysis:</b> {insight}</div>"
-            f"<div style='background-color:#f8f9fa; color:#383d41; padding:10px; border-radius:8px; margin-top:5px;'><b>📚 Sources:</b><br>{sources_html}</div>"
-        )
+        price_future = submit_branch(lambda: price_html(coin_ids, currencies) if coin_ids else "❌ No coin specified.")
+    analysis = stream_analysis(query, coin_symbol)
+    try:
+        if query_type == "hybrid":
+            price_info = branch_result(price_future, "price", PRICE_TIMEOUT)
+            if isinstance(price_info, Exception):
+                price_info = f"⚠ Price unavailable right now ({price_info})."
+            yield cards(price_info)
+
+        insight = ""
+        try:
+            for kind, value in analysis:
+                if kind == "token":
+                    insight += value
+                    yield cards(price_info, insight)
+                else:
+                    yield cards(price_info, insight, build_sources(value["source_documents"]))
+        except Exception as e:
+            yield cards(price_info, insight + f" ⚠ Analysis unavailable right now ({e}).", "")
+    finally:
+        # Gradio closes this generator when the client goes away; stop the LLM stream with it
+        analysis.close()
 
 # === CHATBOT TEXT HANDLER ===
 def chat_with_bot(message, history):
     if not message.strip():
-        return history + [{"role": "assistant", "content": "⚠ Please enter a question."}]
+        yield history + [{"role": "assistant", "content": "⚠ Please enter a question."}]
+        return
 
-    bot_response = handle_query(message)
-    return history + [
-        {"role": "user", "content": message},
-        {"role": "assistant", "content": bot_response}
-    ]
+    history = history + [{"role": "user", "content": message}]
+    # Each partial response replaces the last one, so the reply grows in place
+    for bot_response in handle_query(message):
+        yield history + [{"role": "assistant", "content": bot_response}]
 
 # === VOICE HANDLER ===
 def handle_voice(file_path, history):
     if not file_path:
-        return history
+        yield history
+        return
 
-    import whisper
-    model = whisper.load_model("base")
-    result = model.transcribe(file_path)
-    query_text = result["text"]
+    try:
+        query_text = get_transcriber().transcribe(file_path)
+    except TranscriberBusy:
+        yield history + [{"role": "assistant", "content": "⚠ Voice is busy right now, please try again in a moment or type your question."}]
+        return
+    except Exception as e:
+        yield history + [{"role": "assistant", "content": f"❌ Could not transcribe the recording: {e}"}]
+        return
 
-    bot_reply = handle_query(query_text)
-    return history + [
-        {"role": "user", "content": f"(voice) {query_text}"},
-        {"role": "assistant", "content": bot_reply}
-    ]
+    history = history + [{"role": "user", "content": f"(voice) {query_text}"}]
+    for bot_reply in handle_query(query_text):
+        yield history + [{"role": "assistant", "content": bot_reply}]
 
 # === BUILD GRADIO UI ===
 with gr.Blocks(theme=gr.themes.Soft()) as demo:
@@ -177,5 +172,10 @@ with gr.Blocks(theme=gr.themes.Soft()) as demo:
             voice.change(handle_voice, [voice, chatbot], chatbot)
 
 # === RUN APP ===
+# Background work starts only here: spawned Whisper workers re-import this file as __mp_main__
 if __name__ == "__main__":
+    # Watchlist prices answered from memory when MARKET_POLLER=1
+    start_market_poller_if_enabled()
+    # Whisper workers load the model in the background while the UI starts
+    get_transcriber().warm()
     demo.launch()
@@ -0,0 +1,149 @@
+import asyncio
+import random
+import time
+
+import tiktoken
+
+# === CONFIG ===
+EMBEDDING_MODEL = "text-embedding-ada-002"
+MAX_BATCH_TOKENS = 100_000   # OpenAI caps a single embeddings request at 300k tokens
+MAX_BATCH_SIZE = 1000        # ... and at 2048 inputs
+MAX_IN_FLIGHT = 4
+MAX_RETRIES = 8
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+
+_encodings = {}
+
+def count_tokens(text: str, model: str = EMBEDDING_MODEL) -> int:
+    if model not in _encodings:
+        _encodings[model] = tiktoken.encoding_for_model(model)
+    return len(_encodings[model].encode(text, disallowed_special=()))
+
+def pack_batches(items, max_tokens=MAX_BATCH_TOKENS, max_items=MAX_BATCH_SIZE, model=EMBEDDING_MODEL):
+    """
+    Lazily group (id, Document) pairs into batches whose total token count
+    stays under max_tokens. A single oversized document gets a batch of its own.
+    """
+    batch, batch_tokens = [], 0
+    for item in items:
+        tokens = count_tokens(item[1].page_content, model)
+        if batch and (batch_tokens + tokens > max_tokens or len(batch) >= max_items):
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append(item)
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+def is_rate_limit(exc: Exception) -> bool:
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    return status == 429 or type(exc).__name__ == "RateLimitError"
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency gate for in-flight batches (AIMD): a 429 halves the number
+    of allowed requests, every few clean responses earn one slot back.
+    """
+
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT, recover_after=5):
+        self.max_in_flight = max_in_flight
+        self.limit = max_in_flight
+        self.recover_after = recover_after
+        self.in_flight = 0
+        self._successes = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    async def on_success(self):
+        async with self._cond:
+            self._successes += 1
+            if self._successes >= self.recover_after and self.limit < self.max_in_flight:
+                self.limit += 1
+                self._successes = 0
+                self._cond.notify_all()
+
+    async def on_rate_limit(self):
+        async with self._cond:
+            self.limit = max(1, self.limit // 2)
+            self._successes = 0
+
+
+def chroma_sink(db):
+    """Write pre-computed vectors straight into a langchain Chroma store (upsert by id)."""
+    def write(ids, docs, vectors):
+        db._collection.upsert(
+            ids=ids,
+            embeddings=vectors,
+            documents=[d.page_content for d in docs],
+            metadatas=[d.metadata for d in docs],
+        )
+    return write
+
+async def _embed_with_backoff(embeddings, texts, limiter, stats):
+    for attempt in range(MAX_RETRIES):
+        try:
+            return await embeddings.aembed_documents(texts)
+        except Exception as e:
+            if attempt == MAX_RETRIES - 1:
+                raise
+            if is_rate_limit(e):
+                stats["rate_limited"] += 1
+                await limiter.on_rate_limit()
+            else:
+                stats["retries"] += 1
+            delay = min(MAX_BACKOFF, BASE_BACKOFF * 2 ** attempt)
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+async def embed_and_store(items, embeddings, sink, max_tokens=MAX_BATCH_TOKENS,
+                          max_items=MAX_BATCH_SIZE, max_in_flight=MAX_IN_FLIGHT):
+    """
+    Embed an iterable of (id, Document) pairs with up to max_in_flight batches
+    running concurrently, and hand every finished batch to sink(ids, docs, vectors)
+    as soon as it returns. The input is consumed lazily: at most max_in_flight
+    batches are held in memory at once.
+    """
+    limiter = AdaptiveLimiter(max_in_flight)
+    write_lock = asyncio.Lock()
+    stats = {"batches": 0, "chunks": 0, "rate_limited": 0, "retries": 0}
+    tasks = set()
+    started = time.perf_counter()
+
+    async def run(batch):
+        try:
+            ids = [cid for cid, _ in batch]
+            docs = [doc for _, doc in batch]
+            vectors = await _embed_with_backoff(embeddings, [d.page_content for d in docs], limiter, stats)
+            async with write_lock:
+                await asyncio.to_thread(sink, ids, docs, vectors)
+            await limiter.on_success()
+            stats["batches"] += 1
+            stats["chunks"] += len(batch)
+        finally:
+            await limiter.release()
+
+    for batch in pack_batches(items, max_tokens, max_items):
+        await limiter.acquire()
+        tasks.add(asyncio.create_task(run(batch)))
+        # surface failures early instead of embedding the rest of the corpus first
+        for done in [t for t in tasks if t.done()]:
+            tasks.discard(done)
+            done.result()
+    await asyncio.gather(*tasks)
+
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    return stats
+
+def embed_into_chroma(db, items, embeddings, **kwargs):
+    """Blocking entry point for the ingest scripts."""
+    return asyncio.run(embed_and_store(items, embeddings, chroma_sink(db), **kwargs))
@@ -0,0 +1,51 @@
+import sys, os
+# Make "src" importable when running this file directly
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+import argparse
+import itertools
+
+from pipeline.chunk_io import find_chunk_file
+from pipeline.dedup import MinHashDeduper, DEFAULT_THRESHOLD
+from pipeline.ingest_to_chromadb import SUBSTACK_CHUNKS, REDDIT_CHUNKS, load_chunks, with_ids
+from pipeline.embed_transcripts import load_video_map, load_transcript_chunks
+from pipeline.parallel_chunking import SPLITTERS
+from pipeline.tag_coins import tag_chunks
+from tools.bm25_index import BM25Index, BM25_INDEX_DIR
+from tools.answer_cache import bump_index_version
+
+def corpus_groups(workers=1, splitter="char"):
+    """
+    (id, Document) streams in the groups ingest dedups on its own, with the
+    vector store's ids: Substack + Reddit (ingest_to_chromadb) and
+    transcripts (embed_transcripts, cut with the same `splitter`).
+    """
+    chunk_docs = itertools.chain(load_chunks(find_chunk_file(SUBSTACK_CHUNKS)),
+                                 load_chunks(find_chunk_file(REDDIT_CHUNKS)))
+    yield with_ids(chunk_docs)
+    yield load_transcript_chunks(load_video_map(), workers=workers, splitter=splitter).items()
+
+def corpus(workers=1, dedup_threshold=0.0, splitter="char"):
+    """Every chunk, each group deduped with its own MinHashDeduper exactly like ingest."""
+    for group in corpus_groups(workers, splitter):
+        if dedup_threshold > 0:
+            group = MinHashDeduper(threshold=dedup_threshold).filter(group)
+        yield from group
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the BM25 inverted index over all chunks.")
+    parser.add_argument("--output", default=BM25_INDEX_DIR)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--dedup-threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="use the same value as ingest so both indexes hold the same chunks; 0 disables")
+    parser.add_argument("--splitter", choices=SPLITTERS, default="char",
+                        help="transcript splitter; must match embed_transcripts.py --splitter or the chunk ids differ")
+    args = parser.parse_args()
+
+    items = corpus(args.workers, args.dedup_threshold, args.splitter)
+    # Same coin tags as the vector store, so coin filters pre-filter BM25 too
+    items = tag_chunks(items, {})
+
+    print("📇 Building BM25 index...")
+    index = BM25Index.build(args.output, ((cid, doc.page_content, doc.metadata) for cid, doc in items))
+    bump_index_version()
+    print(f"💾 Indexed {len(index)} chunks / {len(index.term_ids)} terms → {args.output}")
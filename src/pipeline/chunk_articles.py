@@ -1,26 +1,33 @@
-import os
+import sys, os
+# Make "src" importable when running this file directly
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 import json
+import argparse
 from pathlib import Path
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from pipeline.chunk_io import write_chunks
+from pipeline.parallel_chunking import parallel_split, default_workers, SPLITTERS
 
 INPUT_DIR = "articles"
-CHUNKED_FILE = "chunked_docs.json"
+CHUNKED_FILE = "chunked_docs.jsonl"
+TOKEN_CHUNK_SIZE = 128
+TOKEN_CHUNK_OVERLAP = 24
 
 def load_articles():
-    docs = []
-    for file in os.listdir(INPUT_DIR):
+    for file in sorted(os.listdir(INPUT_DIR)):
         if file.endswith(".json"):
             with open(os.path.join(INPUT_DIR, file), "r", encoding="utf-8") as f:
-                data = json.load(f)
-                docs.append(data)
-    return docs
+                yield json.load(f)
 
-def chunk_documents(articles, chunk_size=500, chunk_overlap=100):
-    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-    all_chunks = []
+def chunk_documents(articles, chunk_size=500, chunk_overlap=100, workers=1, splitter="char"):
+    """
+    Yield chunk dicts one article at a time, so nothing is held in memory.
+    With workers > 1 the splitting fans out over a process pool; output order is unchanged.
+    splitter="token" measures chunk_size/chunk_overlap in tokens instead of characters.
+    """
+    splits = parallel_split(articles, lambda a: a["content"], chunk_size, chunk_overlap, workers, splitter)
 
-    for article in articles:
-        text = article["content"]
+    for article, chunks in splits:
         metadata = {
             "source": article.get("source", ""),
             "title": article.get("title", ""),
@@ -28,24 +35,25 @@ def chunk_documents(articles, chunk_size=500, chunk_overlap=100):
             "date": article.get("date", "")
         }
 
-        chunks = splitter.split_text(text)
         for i, chunk in enumerate(chunks):
-            all_chunks.append({
+            yield {
                 "text": chunk,
                 "metadata": {**metadata, "chunk_id": i}
-            })
-
-    return all_chunks
+            }
 
 if __name__ == "__main__":
-    print("📄 Loading articles...")
-    articles = load_articles()
-    print(f"✅ Loaded {len(articles)} articles")
-
-    print("🔪 Chunking...")
-    chunked_docs = chunk_documents(articles)
-
-    with open(CHUNKED_FILE, "w", encoding="utf-8") as f:
-        json.dump(chunked_docs, f, ensure_ascii=False, indent=2)
-
-    print(f"💾 Saved {len(chunked_docs)} chunks to {CHUNKED_FILE}")
+    parser = argparse.ArgumentParser(description="Chunk scraped Substack articles into JSONL.")
+    parser.add_argument("--output", default=CHUNKED_FILE,
+                        help="output file; a .gz or .zst suffix compresses it")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes used for splitting (0 = one per CPU core)")
+    parser.add_argument("--splitter", choices=SPLITTERS, default="char",
+                        help=f"'token' cuts {TOKEN_CHUNK_SIZE}-token chunks on sentence boundaries")
+    args = parser.parse_args()
+
+    print(f"📄 Chunking articles from {INPUT_DIR}...")
+    workers = args.workers or default_workers()
+    sizes = {"chunk_size": TOKEN_CHUNK_SIZE, "chunk_overlap": TOKEN_CHUNK_OVERLAP} if args.splitter == "token" else {}
+    count = write_chunks(args.output, chunk_documents(load_articles(), workers=workers, splitter=args.splitter, **sizes))
+
+    print(f"💾 Saved {count} chunks to {args.output}")
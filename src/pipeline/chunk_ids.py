@@ -0,0 +1,16 @@
+import hashlib
+
+
+def text_hash(text: str, length: int = 16) -> str:
+    """Short, stable SHA-256 digest of a chunk's text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:length]
+
+
+def make_chunk_id(source_key: str, index: int, text: str) -> str:
+    """
+    Deterministic chunk id built from the source key (video_id, url, ...),
+    the chunk's position inside that source and a hash of its text.
+    Re-chunking unchanged content always yields the same ids, so they can be
+    used to diff the vector store against what is on disk.
+    """
+    return f"{source_key}:{index}:{text_hash(text)}"
@@ -0,0 +1,57 @@
+import gzip
+import json
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:  # zstd output is optional
+    zstandard = None
+
+# Preferred first: the first existing file wins in find_chunk_file
+CHUNK_SUFFIXES = [".jsonl.zst", ".jsonl.gz", ".jsonl", ".json"]
+
+def open_chunk_file(path, mode="r"):
+    """Open a chunk file as text, transparently (de)compressing .gz / .zst."""
+    path = str(path)
+    text_mode = mode[0] + "t"
+    if path.endswith(".gz"):
+        return gzip.open(path, text_mode, encoding="utf-8")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("❌ Reading/writing .zst chunk files needs `pip install zstandard`.")
+        return zstandard.open(path, text_mode, encoding="utf-8")
+    return open(path, text_mode, encoding="utf-8")
+
+def write_chunks(path, chunks) -> int:
+    """Stream chunk dicts to newline-delimited JSON as they are produced. Returns the count."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with open_chunk_file(path, "w") as f:
+        for chunk in chunks:
+            f.write(json.dumps(chunk, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    return count
+
+def iter_chunks(path):
+    """
+    Lazily yield chunk dicts from a JSONL file (optionally compressed).
+    Legacy `.json` array files are still accepted, but are loaded in one go.
+    """
+    if str(path).endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+        return
+
+    with open_chunk_file(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def find_chunk_file(base):
+    """Resolve e.g. 'chunked_docs' to whichever of .jsonl.zst/.jsonl.gz/.jsonl/.json exists."""
+    for suffix in CHUNK_SUFFIXES:
+        candidate = Path(f"{base}{suffix}")
+        if candidate.exists():
+            return candidate
+    raise FileNotFoundError(f"❌ No chunk file found for '{base}' ({', '.join(CHUNK_SUFFIXES)})")
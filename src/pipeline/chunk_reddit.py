@@ -1,26 +1,37 @@
+import sys, os
+# Make "src" importable when running this file directly
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 import json
+import argparse
 from pathlib import Path
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from pipeline.chunk_io import write_chunks
+from pipeline.parallel_chunking import parallel_split, default_workers, SPLITTERS
 
 INPUT_FILE = "reddit_data/reddit_posts.json"
-OUTPUT_FILE = "reddit_data/chunked_reddit.json"
+OUTPUT_FILE = "reddit_data/chunked_reddit.jsonl"
+TOKEN_CHUNK_SIZE = 128
+TOKEN_CHUNK_OVERLAP = 24
 
 def load_reddit_posts():
     with open(INPUT_FILE, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def chunk_posts(posts, chunk_size=500, chunk_overlap=100):
-    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-    all_chunks = []
+def post_content(post):
+    return f"{post['title']}\n\n{post['text']}".strip()
 
-    for post in posts:
-        content = f"{post['title']}\n\n{post['text']}".strip()
-        if not content:
-            continue
+def chunk_posts(posts, chunk_size=500, chunk_overlap=100, workers=1, splitter="char"):
+    """
+    Yield chunk dicts post by post instead of building the whole list.
+    With workers > 1 the splitting fans out over a process pool; output order is unchanged.
+    splitter="token" measures chunk_size/chunk_overlap in tokens instead of characters.
+    """
+    posts = (post for post in posts if post_content(post))
+    splits = parallel_split(posts, post_content, chunk_size, chunk_overlap, workers, splitter)
 
-        chunks = splitter.split_text(content)
+    for post, chunks in splits:
         for i, chunk in enumerate(chunks):
-            chunk_data = {
+            yield {
                 "text": chunk,
                 "metadata": {
                     "source": "reddit",
@@ -32,20 +43,24 @@ def chunk_posts(posts, chunk_size=500, chunk_overlap=100):
                     "chunk_id": i
                 }
             }
-            all_chunks.append(chunk_data)
-
-    return all_chunks
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunk scraped Reddit posts into JSONL.")
+    parser.add_argument("--output", default=OUTPUT_FILE,
+                        help="output file; a .gz or .zst suffix compresses it")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes used for splitting (0 = one per CPU core)")
+    parser.add_argument("--splitter", choices=SPLITTERS, default="char",
+                        help=f"'token' cuts {TOKEN_CHUNK_SIZE}-token chunks on sentence boundaries")
+    args = parser.parse_args()
+
     print("📂 Loading reddit posts...")
     posts = load_reddit_posts()
     print(f"✅ Loaded {len(posts)} posts")
 
     print("🔪 Chunking...")
-    chunked = chunk_posts(posts)
-
-    Path("reddit_data").mkdir(exist_ok=True)
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(chunked, f, ensure_ascii=False, indent=2)
+    workers = args.workers or default_workers()
+    sizes = {"chunk_size": TOKEN_CHUNK_SIZE, "chunk_overlap": TOKEN_CHUNK_OVERLAP} if args.splitter == "token" else {}
+    count = write_chunks(args.output, chunk_posts(posts, workers=workers, splitter=args.splitter, **sizes))
 
-    print(f"💾 Saved {len(chunked)} chunks to {OUTPUT_FILE}")
+    print(f"💾 Saved {count} chunks to {args.output}")
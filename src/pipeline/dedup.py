@@ -0,0 +1,121 @@
+import re
+import json
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+# === CONFIG ===
+DEFAULT_THRESHOLD = 0.85   # estimated Jaccard similarity above which a chunk is a duplicate
+NUM_PERM = 128
+SHINGLE_SIZE = 5           # word n-grams
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+def shingles(text: str, size: int = SHINGLE_SIZE):
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def _hash32(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+
+def lsh_params(threshold: float, num_perm: int):
+    """Pick (bands, rows) so the LSH S-curve crosses just below the threshold."""
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+class MinHashDeduper:
+    """
+    Streaming near-duplicate filter: MinHash signatures over word shingles,
+    bucketed with banded LSH. Candidates sharing a bucket are confirmed with
+    the estimated Jaccard similarity before a chunk is dropped.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE, seed=1):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        # a, b < 2^31 keep a * hash + b inside uint64
+        self._a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        self._buckets = [{} for _ in range(self.bands)]
+        self._signatures = {}
+        self._exact = {}
+        self.kept = 0
+        self.dropped = []
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.fromiter((_hash32(s) for s in shingles(text, self.shingle_size)), dtype=np.uint64)
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=1)
+
+    def _band_keys(self, sig):
+        return [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _probe(self, text: str):
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        if digest in self._exact:
+            return self._exact[digest], 1.0, None, None, digest
+
+        sig = self.signature(text)
+        band_keys = self._band_keys(sig)
+        seen = set()
+        for bucket, band_key in zip(self._buckets, band_keys):
+            for candidate in bucket.get(band_key, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                similarity = float(np.mean(self._signatures[candidate] == sig))
+                if similarity >= self.threshold:
+                    return candidate, similarity, sig, band_keys, digest
+        return None, 0.0, sig, band_keys, digest
+
+    def find_duplicate(self, text: str):
+        """Return (key, similarity) of a kept chunk this text duplicates, else (None, 0.0)."""
+        match, similarity, *_ = self._probe(text)
+        return match, similarity
+
+    def add(self, key, text: str) -> bool:
+        """Index `text` under `key` unless it duplicates a kept chunk. Returns True if kept."""
+        match, similarity, sig, band_keys, digest = self._probe(text)
+        if match is not None:
+            self.dropped.append({"dropped": key, "duplicate_of": match, "similarity": round(similarity, 3)})
+            return False
+
+        self._exact[digest] = key
+        self._signatures[key] = sig
+        for bucket, band_key in zip(self._buckets, band_keys):
+            bucket.setdefault(band_key, []).append(key)
+        self.kept += 1
+        return True
+
+    def filter(self, items, key=lambda item: item[0], text=lambda item: item[1].page_content):
+        """Lazily yield the items that are not near-duplicates of an earlier item."""
+        for item in items:
+            if self.add(key(item), text(item)):
+                yield item
+
+    def report(self) -> dict:
+        return {
+            "threshold": self.threshold,
+            "bands": self.bands,
+            "rows": self.rows,
+            "kept": self.kept,
+            "dropped_count": len(self.dropped),
+            "dropped": self.dropped,
+        }
+
+    def save_report(self, path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
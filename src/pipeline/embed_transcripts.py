@@ -1,29 +1,38 @@
-import os
+import sys, os
+# Make "src" importable when running this file directly
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 import json
+import argparse
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 
-from langchain_community.document_loaders import TextLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import Chroma
+from langchain.schema import Document
+
+from pipeline.chunk_ids import make_chunk_id
+from pipeline.batch_embedder import embed_into_chroma
+from pipeline.parallel_chunking import parallel_split, default_workers, SPLITTERS
+from pipeline.tag_coins import tag_chunks, save_postings
+from pipeline.dedup import MinHashDeduper, DEFAULT_THRESHOLD
+from tools.embedding_cache import get_embeddings
+from tools.answer_cache import bump_index_version
 
 # === LOAD ENV VARIABLES ===
 load_dotenv()
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if not OPENAI_API_KEY:
-    raise ValueError("❌ OPENAI_API_KEY not found in .env file or environment variables.")
-
 # === CONFIG ===
 TRANSCRIPTS_DIR = Path(r"C:\Users\nicho\Documents\crypto_bot\data\transcripts")
 VIDEOS_JSON = Path(r"C:\Users\nicho\Documents\crypto_bot\videos.json")
 CHROMA_DB_DIR = Path(r"C:\Users\nicho\Documents\crypto_bot\chroma_db")
-
-# === LOAD VIDEO METADATA ===
-with open(VIDEOS_JSON, "r", encoding="utf-8") as f:
-    videos = json.load(f)
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+TOKEN_CHUNK_SIZE = 256
+TOKEN_CHUNK_OVERLAP = 24
+DELETE_BATCH_SIZE = 5000
+DEDUP_REPORT = Path("dedup_report_transcripts.json")
+# Stage name in coin_index.json
+COIN_STAGE = "transcripts"
 
 def get_video_id(url):
     if "v=" in url:
@@ -32,41 +41,126 @@ def get_video_id(url):
         return url.split("/")[-1]
     return None
 
-video_map = {}
-for v in videos:
-    vid_id = get_video_id(v["url"])
-    if vid_id:
-        video_map[vid_id] = v
-
-# === INIT COMPONENTS ===
-embeddings = OpenAIEmbeddings(model="text-embedding-ada-002", api_key=OPENAI_API_KEY)
-text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
+def load_video_map():
+    with open(VIDEOS_JSON, "r", encoding="utf-8") as f:
+        videos = json.load(f)
 
-all_docs = []
+    video_map = {}
+    for v in videos:
+        vid_id = get_video_id(v["url"])
+        if vid_id:
+            video_map[vid_id] = v
+    return video_map
 
 # === LOAD, CHUNK, ADD METADATA ===
-for transcript_file in TRANSCRIPTS_DIR.glob("*.txt"):
-    video_id = transcript_file.stem.split("_")[-1]
-    video_info = video_map.get(video_id, {})
+def load_transcript_chunks(video_map, workers=1, splitter="char"):
+    """
+    Split every transcript on disk and return {chunk_id: Document}.
+    Ids are deterministic (video_id, chunk index, text hash), so an unchanged
+    transcript always maps to the ids already stored in Chroma.
+    With workers > 1 the splitting runs in a process pool; the result is identical.
+    splitter="token" cuts TOKEN_CHUNK_SIZE-token chunks on sentence boundaries.
+    """
+    transcript_files = sorted(TRANSCRIPTS_DIR.glob("*.txt"))
+    read_text = lambda path: path.read_text(encoding="utf-8")
+    ingest_date = datetime.utcnow().strftime("%Y-%m-%d")
 
-    loader = TextLoader(str(transcript_file), encoding="utf-8")
-    docs = loader.load()
+    if splitter == "token":
+        chunk_size, chunk_overlap = TOKEN_CHUNK_SIZE, TOKEN_CHUNK_OVERLAP
+    else:
+        chunk_size, chunk_overlap = CHUNK_SIZE, CHUNK_OVERLAP
 
-    for doc in docs:
-        doc.metadata = {
+    chunks = {}
+    splits = parallel_split(transcript_files, read_text, chunk_size, chunk_overlap, workers, splitter)
+    for transcript_file, texts in splits:
+        video_id = transcript_file.stem.split("_")[-1]
+        video_info = video_map.get(video_id, {})
+        metadata = {
             "source": "youtube",
             "video_id": video_id,
             "title": video_info.get("title", transcript_file.stem),
             "url": video_info.get("url", ""),
-            "ingest_date": datetime.utcnow().strftime("%Y-%m-%d")
+            "ingest_date": ingest_date
         }
 
-    split_docs = text_splitter.split_documents(docs)
-    all_docs.extend(split_docs)
+        for i, text in enumerate(texts):
+            doc = Document(page_content=text, metadata={**metadata, "chunk_id": i})
+            chunks[make_chunk_id(video_id, i, text)] = doc
+    return chunks
+
+def fetch_stored_ids(db):
+    """Ids of every YouTube chunk currently in the store."""
+    stored = db.get(where={"source": "youtube"}, include=[])
+    return set(stored["ids"])
+
+def delete_ids(db, ids):
+    ids = list(ids)
+    for start in range(0, len(ids), DELETE_BATCH_SIZE):
+        db.delete(ids=ids[start:start + DELETE_BATCH_SIZE])
+
+def sync_transcripts(db, embeddings, chunks, full=False):
+    """
+    Upsert transcript chunks into Chroma.
+    Only chunks whose id is not stored yet are embedded; stored chunks that no
+    longer exist on disk (edited or deleted transcripts) are removed.
+    With full=True every YouTube chunk is dropped and re-embedded.
+    """
+    stored_ids = fetch_stored_ids(db)
+    if full:
+        stale_ids, new_ids = stored_ids, list(chunks)
+    else:
+        stale_ids = stored_ids - chunks.keys()
+        new_ids = [cid for cid in chunks if cid not in stored_ids]
+
+    if stale_ids:
+        delete_ids(db, stale_ids)
+    if new_ids:
+        stats = embed_into_chroma(db, ((cid, chunks[cid]) for cid in new_ids), embeddings)
+        print(f"⚡ Embedding batches: {stats}")
+    return new_ids, stale_ids
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed YouTube transcripts into ChromaDB.")
+    parser.add_argument("--full", action="store_true",
+                        help="drop all stored transcript chunks and re-embed everything")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes used for splitting (0 = one per CPU core)")
+    parser.add_argument("--splitter", choices=SPLITTERS, default="char",
+                        help=f"'token' cuts {TOKEN_CHUNK_SIZE}-token chunks on sentence boundaries")
+    parser.add_argument("--dedup-threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="drop chunks at least this similar (MinHash Jaccard) to an earlier one; 0 disables")
+    args = parser.parse_args()
+
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    if not OPENAI_API_KEY:
+        raise ValueError("❌ OPENAI_API_KEY not found in .env file or environment variables.")
+
+    # === INIT COMPONENTS ===
+    embeddings = get_embeddings("text-embedding-ada-002", api_key=OPENAI_API_KEY)
+    db = Chroma(persist_directory=str(CHROMA_DB_DIR), embedding_function=embeddings)
+
+    chunks = load_transcript_chunks(load_video_map(), workers=args.workers or default_workers(), splitter=args.splitter)
+    print(f"✅ Loaded and split {len(chunks)} chunks from {len(list(TRANSCRIPTS_DIR.glob('*.txt')))} transcripts.")
+
+    # Repeated intros and sponsor reads are dropped before they cost an embedding
+    if args.dedup_threshold > 0:
+        deduper = MinHashDeduper(threshold=args.dedup_threshold)
+        chunks = dict(deduper.filter(chunks.items()))
+        deduper.save_report(DEDUP_REPORT)
+        print(f"🧹 Dropped {len(deduper.dropped)} near-duplicate chunks (report: {DEDUP_REPORT})")
+
+    # Coins are tagged on every current chunk; only new chunks carry them into Chroma (use --full to retag all)
+    coin_postings = {}
+    chunks = dict(tag_chunks(chunks.items(), coin_postings))
+    save_postings(COIN_STAGE, coin_postings)
 
-print(f"✅ Loaded and split {len(all_docs)} chunks from {len(list(TRANSCRIPTS_DIR.glob('*.txt')))} transcripts.")
+    # === STORE IN CHROMA ===
+    new_ids, stale_ids = sync_transcripts(db, embeddings, chunks, full=args.full)
+    db.persist()
+    bump_index_version()
+    print(f"🗑 Removed {len(stale_ids)} stale chunks")
+    print(f"📦 Embedded {len(new_ids)} new chunks ({len(chunks) - len(new_ids)} unchanged) in ChromaDB at {CHROMA_DB_DIR}")
+    print(f"🧮 Embedding cache: {embeddings.stats()}")
 
-# === STORE IN CHROMA ===
-db = Chroma.from_documents(all_docs, embeddings, persist_directory=str(CHROMA_DB_DIR))
-db.persist()
-print(f"📦 Stored {len(all_docs)} chunks in ChromaDB at {CHROMA_DB_DIR}")
+if __name__ == "__main__":
+    main()
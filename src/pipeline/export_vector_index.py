@@ -0,0 +1,60 @@
+import sys, os
+# Make "src" importable when running this file directly
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+import argparse
+
+import numpy as np
+
+from langchain_community.vectorstores import Chroma
+
+from tools.vector_index import NumpyVectorIndex, recall_at_k
+from tools.vector_store import CHROMA_DIR, NUMPY_INDEX_DIR
+from tools.answer_cache import bump_index_version
+
+PAGE_SIZE = 5000
+# Queries used for the recall@k report of a quantized export
+RECALL_QUERIES = 200
+RECALL_K = (4, 10)
+
+def read_collection(db):
+    """Page through a Chroma collection and return ids, vectors, texts, metadatas."""
+    ids, vectors, texts, metadatas = [], [], [], []
+    offset = 0
+    while True:
+        page = db._collection.get(include=["embeddings", "documents", "metadatas"],
+                                  limit=PAGE_SIZE, offset=offset)
+        if not page["ids"]:
+            break
+        ids.extend(page["ids"])
+        vectors.extend(page["embeddings"])
+        texts.extend(page["documents"])
+        metadatas.extend(page["metadatas"])
+        offset += len(page["ids"])
+    return ids, vectors, texts, metadatas
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the Chroma store into a NumPy vector index.")
+    parser.add_argument("--chroma-dir", default=CHROMA_DIR)
+    parser.add_argument("--output", default=NUMPY_INDEX_DIR)
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32",
+                        help="float16 halves the index size at a tiny recall cost")
+    parser.add_argument("--quantize", choices=["int8"], default=None,
+                        help="also write int8 codes: ~4x less memory per serving worker, exact float re-rank")
+    args = parser.parse_args()
+
+    print(f"📦 Reading Chroma store at {args.chroma_dir}...")
+    ids, vectors, texts, metadatas = read_collection(Chroma(persist_directory=args.chroma_dir))
+    print(f"✅ Read {len(ids)} chunks")
+
+    index = NumpyVectorIndex.build(args.output, ids, vectors, texts, metadatas, dtype=args.dtype, quantize=args.quantize)
+    bump_index_version()
+    print(f"💾 Wrote {len(index)} x {index.vectors.shape[1]} {args.dtype} index to {args.output}")
+
+    if index.codes is not None and len(index):
+        # Midpoints of random chunk pairs: realistic query vectors that are not themselves in the index
+        rng = np.random.default_rng(0)
+        pairs = rng.integers(0, len(index), size=(RECALL_QUERIES, 2))
+        queries = np.asarray(index.vectors[pairs[:, 0]], dtype=np.float32) + np.asarray(index.vectors[pairs[:, 1]], dtype=np.float32)
+        print(f"🗜 int8 codes: {index.codes.nbytes / 1e6:.1f} MB vs {index.vectors.nbytes / 1e6:.1f} MB {args.dtype}")
+        for k in RECALL_K:
+            print(f"🎯 recall@{k} vs exact search: {recall_at_k(index, queries, k):.3f}")
@@ -1,44 +1,77 @@
+import sys, os
+# Make "src" importable when running this file directly
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 from dotenv import load_dotenv
 load_dotenv()
 
-import os
-import json
+import argparse
+import itertools
 from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import OpenAIEmbeddings
 from langchain.schema import Document
 
+from tools.embedding_cache import get_embeddings
+from pipeline.chunk_ids import make_chunk_id
+from pipeline.batch_embedder import embed_into_chroma
+from pipeline.chunk_io import iter_chunks, find_chunk_file
+from pipeline.dedup import MinHashDeduper, DEFAULT_THRESHOLD
+from pipeline.tag_coins import tag_chunks, save_postings
+from tools.answer_cache import bump_index_version
+
 CHROMA_DIR = "chroma_store"
+SUBSTACK_CHUNKS = "chunked_docs"
+REDDIT_CHUNKS = "reddit_data/chunked_reddit"
+# Chunks read from disk per embedding batch; keeps peak memory flat regardless of corpus size
+LOAD_BATCH_SIZE = 500
+DEDUP_REPORT = "dedup_report.json"
+# Stage name in coin_index.json
+COIN_STAGE = "articles_reddit"
 
 def load_chunks(filepath):
-    with open(filepath, "r", encoding="utf-8") as f:
-        raw_chunks = json.load(f)
+    """Lazily turn a chunk file (JSONL, .gz, .zst or legacy .json) into Documents."""
+    for item in iter_chunks(filepath):
+        yield Document(page_content=item["text"], metadata=item["metadata"])
 
-    return [
-        Document(page_content=item["text"], metadata=item["metadata"])
-        for item in raw_chunks
-    ]
+def with_ids(docs):
+    """Pair each chunk with a deterministic id so re-ingesting upserts instead of duplicating."""
+    for doc in docs:
+        meta = doc.metadata
+        source_key = meta.get("url") or meta.get("title", "")
+        yield make_chunk_id(source_key, meta.get("chunk_id", 0), doc.page_content), doc
 
 if __name__ == "__main__":
-    print("📦 Loading Substack chunks...")
-    substack_docs = load_chunks("chunked_docs.json")
-    print(f"✅ Loaded {len(substack_docs)} Substack documents")
-
-    print("📦 Loading Reddit chunks...")
-    reddit_docs = load_chunks("reddit_data/chunked_reddit.json")
-    print(f"✅ Loaded {len(reddit_docs)} Reddit documents")
+    parser = argparse.ArgumentParser(description="Embed Substack + Reddit chunks into ChromaDB.")
+    parser.add_argument("--dedup-threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="drop chunks at least this similar (MinHash Jaccard) to an earlier one; 0 disables")
+    parser.add_argument("--dedup-report", default=DEDUP_REPORT)
+    args = parser.parse_args()
 
-    all_docs = substack_docs + reddit_docs
-    print(f"📚 Total documents to embed: {len(all_docs)}")
+    substack_file = find_chunk_file(SUBSTACK_CHUNKS)
+    reddit_file = find_chunk_file(REDDIT_CHUNKS)
+    print(f"📦 Streaming chunks from {substack_file} and {reddit_file}...")
+    all_docs = itertools.chain(load_chunks(substack_file), load_chunks(reddit_file))
 
     print("🧠 Initializing OpenAI embeddings...")
-    embedding = OpenAIEmbeddings()
+    embedding = get_embeddings()
 
     print("💾 Ingesting into ChromaDB...")
-    vectordb = Chroma.from_documents(
-        documents=all_docs,
-        embedding=embedding,
-        persist_directory=CHROMA_DIR
-    )
+    vectordb = Chroma(persist_directory=CHROMA_DIR, embedding_function=embedding)
+    items = with_ids(all_docs)
+    deduper = None
+    if args.dedup_threshold > 0:
+        deduper = MinHashDeduper(threshold=args.dedup_threshold)
+        items = deduper.filter(items)
+    coin_postings = {}
+    items = tag_chunks(items, coin_postings)
+    stats = embed_into_chroma(vectordb, items, embedding, max_items=LOAD_BATCH_SIZE)
+    print(f"📚 Embedded {stats['chunks']} documents")
+    print(f"⚡ Embedding batches: {stats}")
+    if deduper:
+        deduper.save_report(args.dedup_report)
+        print(f"🧹 Dropped {len(deduper.dropped)} near-duplicate chunks (report: {args.dedup_report})")
+
+    save_postings(COIN_STAGE, coin_postings)
 
     vectordb.persist()
+    bump_index_version()
     print(f"✅ ChromaDB updated and persisted at: {CHROMA_DIR}")
+    print(f"🧮 Embedding cache: {embedding.stats()}")
@@ -0,0 +1,59 @@
+import os
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from pipeline.token_splitter import TokenBudgetSplitter
+
+# "char": sizes in characters (RecursiveCharacterTextSplitter)
+# "token": sizes in tiktoken tokens, cut on sentence/paragraph boundaries
+SPLITTERS = ("char", "token")
+
+# Texts handed to a worker per task; larger values mean less IPC overhead
+TASK_CHUNKSIZE = 8
+# How many tasks per worker are queued at once, so huge inputs are never materialised
+WINDOW_TASKS = 4
+
+# One splitter per worker process, built once by the pool initializer
+_splitter = None
+
+def build_splitter(kind, chunk_size, chunk_overlap):
+    if kind == "token":
+        return TokenBudgetSplitter(chunk_tokens=chunk_size, overlap_tokens=chunk_overlap)
+    if kind == "char":
+        return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    raise ValueError(f"❌ Unknown splitter '{kind}', expected one of {SPLITTERS}")
+
+def _init_worker(kind, chunk_size, chunk_overlap):
+    global _splitter
+    _splitter = build_splitter(kind, chunk_size, chunk_overlap)
+
+def _split(text):
+    return _splitter.split_text(text)
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+def parallel_split(items, get_text, chunk_size, chunk_overlap, workers=1, splitter="char"):
+    """
+    Yield (item, chunks) for every item, splitting get_text(item) across a
+    process pool. Output order always matches input order, so the result is
+    identical to a single-process run.
+    """
+    if workers <= 1:
+        _init_worker(splitter, chunk_size, chunk_overlap)
+        for item in items:
+            yield item, _split(get_text(item))
+        return
+
+    window_size = workers * TASK_CHUNKSIZE * WINDOW_TASKS
+    items = iter(items)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(splitter, chunk_size, chunk_overlap)) as pool:
+        while True:
+            window = list(islice(items, window_size))
+            if not window:
+                break
+            texts = [get_text(item) for item in window]
+            yield from zip(window, pool.map(_split, texts, chunksize=TASK_CHUNKSIZE))
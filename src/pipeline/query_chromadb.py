@@ -1,10 +1,19 @@
-import os
-import requests
+import sys, os
+# Make "src" importable when running this file directly
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 from dotenv import load_dotenv
-from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+from langchain_openai import ChatOpenAI
 from langchain.chains import RetrievalQA
 
+from tools.embedding_cache import get_embeddings
+from tools.vector_store import get_vectorstore
+from tools.answer_cache import QueryEmbeddingLRU, SemanticAnswerCache
+from tools.context_packer import PackedRetriever
+from tools.price_service import price_summary, price_table, format_price_table
+from tools.query_router import route_query
+from tools.market_poller import start_market_poller_if_enabled
+from tools.fanout import run_branches, PRICE_TIMEOUT, ANALYSIS_TIMEOUT
+
 # === LOAD ENV VARIABLES ===
 load_dotenv()
 
@@ -16,96 +25,48 @@ if not OPENAI_API_KEY:
 CHROMA_DB_DIR = r"C:\Users\nicho\Documents\crypto_bot\chroma_db"
 
 # === INIT EMBEDDINGS & DB ===
-embeddings = OpenAIEmbeddings(model="text-embedding-ada-002", api_key=OPENAI_API_KEY)
-db = Chroma(persist_directory=CHROMA_DB_DIR, embedding_function=embeddings)
-retriever = db.as_retriever(search_kwargs={"k": 8})
+embeddings = QueryEmbeddingLRU(get_embeddings("text-embedding-ada-002", api_key=OPENAI_API_KEY))
+db = get_vectorstore(embeddings, chroma_dir=CHROMA_DB_DIR)
+# 8 candidates, packed into CONTEXT_TOKEN_BUDGET tokens (same-source chunks merged, overlaps dropped)
+retriever = PackedRetriever(base=db.as_retriever(search_kwargs={"k": 8}))
 
 # === LLM ===
 llm = ChatOpenAI(model="gpt-4o", temperature=0, api_key=OPENAI_API_KEY)
 qa = RetrievalQA.from_chain_type(llm=llm, retriever=retriever, return_source_documents=True)
 
-# === COINGECKO PRICE FETCHER ===
-def get_crypto_price(symbol: str):
-    """Fetch current price and 24h change for a given crypto symbol."""
-    try:
-        url = "https://api.coingecko.com/api/v3/simple/price"
-        params = {
-            "ids": symbol.lower(),
-            "vs_currencies": "usd",
-            "include_24hr_change": "true"
-        }
-        resp = requests.get(url, params=params)
-        data = resp.json()
-        if symbol.lower() in data:
-            price = data[symbol.lower()]["usd"]
-            change = data[symbol.lower()]["usd_24h_change"]
-            return f"${price:,.2f} (24h change: {change:.2f}%)"
-        return f"❌ Could not fetch price for '{symbol}'."
-    except Exception as e:
-        return f"⚠ Error fetching price: {e}"
-
-# === DETECT QUERY TYPE ===
-def detect_query_type(query: str):
-    """Determine if query is about price, analysis, or both."""
-    q = query.lower()
-    price_keywords = ["price", "current", "worth", "value", "update", "today", "latest"]
-    analysis_keywords = ["say", "opinion", "think", "analysis", "view", "news", "report", "insight"]
-
-    price_asked = any(word in q for word in price_keywords)
-    analysis_asked = any(word in q for word in analysis_keywords)
-
-    # If query mentions a coin but no explicit price/analysis words → assume hybrid
-    coin_names = ["bitcoin", "btc", "ethereum", "eth", "solana", "sol", "cardano", "ada",
-                  "dogecoin", "doge", "xrp", "ripple", "polkadot", "dot", "litecoin", "ltc",
-                  "avalanche", "avax", "chainlink", "link", "matic", "polygon", "tron", "trx",
-                  "stellar", "xlm", "monero", "xmr"]
-    if any(coin in q for coin in coin_names) and not price_asked and not analysis_asked:
-        return "hybrid"
-
-    if price_asked and analysis_asked:
-        return "hybrid"
-    elif price_asked:
-        return "price"
-    else:
-        return "analysis"
+# === ANSWER CACHE ===
+answer_cache = SemanticAnswerCache()
+
+def ask_qa(query: str, scope=None):
+    """RetrievalQA behind the semantic answer cache; scope (the coin) must match for a hit."""
+    vector = embeddings.embed_query(query)
+    return answer_cache.get_or_compute(vector, lambda: qa.invoke({"query": query}), scope)
+
+# === PRICES ===
+def price_answer(coin_ids, currencies):
+    """One coin in USD as a line, several coins or currencies as a table (one batched request)."""
+    if len(coin_ids) == 1 and currencies == ["usd"]:
+        return price_summary(coin_ids[0])
+    return "\n" + format_price_table(price_table(coin_ids, currencies))
 
 # === HANDLE QUERY ===
 def handle_query(query: str):
-    query_type = detect_query_type(query)
-
-    # Detect coin name and map to CoinGecko ID
-    tokens = {
-        "bitcoin": "bitcoin", "btc": "bitcoin",
-        "ethereum": "ethereum", "eth": "ethereum",
-        "solana": "solana", "sol": "solana",
-        "cardano": "cardano", "ada": "cardano",
-        "dogecoin": "dogecoin", "doge": "dogecoin",
-        "xrp": "ripple", "ripple": "ripple",
-        "polkadot": "polkadot", "dot": "polkadot",
-        "litecoin": "litecoin", "ltc": "litecoin",
-        "avalanche": "avalanche-2", "avax": "avalanche-2",
-        "chainlink": "chainlink", "link": "chainlink",
-        "matic": "polygon", "polygon": "polygon",
-        "tron": "tron", "trx": "tron",
-        "stellar": "stellar", "xlm": "stellar",
-        "monero": "monero", "xmr": "monero"
-    }
-    coin_symbol = None
-    for key, symbol in tokens.items():
-        if key in query.lower():
-            coin_symbol = symbol
-            break
+    # One pass over the question: intent, every coin named, quote currencies
+    route = route_query(query)
+    query_type, coin_ids, currencies = route.intent, route.coins, route.currencies
+    # The first coin scopes the answer cache
+    coin_symbol = coin_ids[0] if coin_ids else None
 
     # Price only
     if query_type == "price":
-        if coin_symbol:
-            return f"{coin_symbol.upper()} price: {get_crypto_price(coin_symbol)}"
+        if coin_ids:
+            return f"{' / '.join(c.upper() for c in coin_ids)} price: {price_answer(coin_ids, currencies)}"
         else:
             return "❌ Please specify a cryptocurrency for price lookup."
 
     # Analysis only
     if query_type == "analysis":
-        result = qa.invoke({"query": query})
+        result = ask_qa(query, coin_symbol)
         answer = result["result"]
         sources = "\n".join(
             [f"- {doc.metadata.get('title', 'Unknown')} ({doc.metadata.get('url', '')})"
@@ -115,8 +76,17 @@ def handle_query(query: str):
 
     # Hybrid: Price + Analysis
     if query_type == "hybrid":
-        price_info = get_crypto_price(coin_symbol) if coin_symbol else "❌ No coin specified."
-        result = qa.invoke({"query": query})
+        # price and retrieval+LLM run side by side; each is cut off by its own timeout
+        branches = run_branches(
+            {"price": lambda: price_answer(coin_ids, currencies) if coin_ids else "❌ No coin specified.",
+             "analysis": lambda: ask_qa(query, coin_symbol)},
+            {"price": PRICE_TIMEOUT, "analysis": ANALYSIS_TIMEOUT},
+        )
+        price_info, result = branches["price"], branches["analysis"]
+        if isinstance(price_info, Exception):
+            price_info = f"⚠ Price unavailable right now ({price_info})."
+        if isinstance(result, Exception):
+            return f"💰 **Price:** {price_info}\n\n📊 **Analysis:** ⚠ Analysis unavailable right now ({result})."
         insight = result["result"]
         sources = "\n".join(
             [f"- {doc.metadata.get('title', 'Unknown')} ({doc.metadata.get('url', '')})"
@@ -125,16 +95,19 @@ def handle_query(query: str):
         return f"💰 **Price:** {price_info}\n\n📊 **Analysis:** {insight}\n\n📚 Sources:\n{sources}"
 
 # === MAIN LOOP ===
-print("💬 Ask about transcripts, prices, or both (type 'exit' to quit)\n")
-
-while True:
-    query = input("You: ").strip()
-    if not query:
-        print("⚠ Please type a question or 'exit' to quit.\n")
-        continue
-    if query.lower() in ["exit", "quit"]:
-        print("👋 Goodbye!")
-        break
-
-    response = handle_query(query)
-    print(f"\n🤖 Bot: {response}\n{'-'*50}\n")
+if __name__ == "__main__":
+    # Watchlist prices answered from memory when MARKET_POLLER=1
+    start_market_poller_if_enabled()
+    print("💬 Ask about transcripts, prices, or both (type 'exit' to quit)\n")
+
+    while True:
+        query = input("You: ").strip()
+        if not query:
+            print("⚠ Please type a question or 'exit' to quit.\n")
+            continue
+        if query.lower() in ["exit", "quit"]:
+            print("👋 Goodbye!")
+            break
+
+        response = handle_query(query)
+        print(f"\n🤖 Bot: {response}\n{'-'*50}\n")
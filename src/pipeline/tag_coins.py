@@ -0,0 +1,38 @@
+import sys, os
+# Make "src" importable when running this file directly
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+import argparse
+
+from tools.coin_matcher import get_coin_tagger, CoinIndex, COIN_INDEX_PATH
+
+def tag_chunks(items, postings: dict, tagger=None):
+    """
+    Ingest stage: set metadata["coins"] on each (id, Document) to the
+    comma-separated CoinGecko ids it mentions, and record coin -> ids in
+    `postings`. Lazy, so it slots between dedup and embedding.
+    """
+    tagger = tagger or get_coin_tagger()
+    for chunk_id, doc in items:
+        coins = tagger.tag(doc.page_content)
+        # Chroma metadata cannot hold lists
+        doc.metadata["coins"] = ",".join(coins)
+        for coin in coins:
+            postings.setdefault(coin, []).append(chunk_id)
+        yield chunk_id, doc
+
+def save_postings(stage: str, postings: dict, path=COIN_INDEX_PATH):
+    CoinIndex.load(path).set_stage(stage, postings).save()
+    print(f"🪙 Tagged {len(postings)} coins across {sum(len(ids) for ids in postings.values())} mentions → {path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show which coins a piece of text is tagged with, or the coin index summary.")
+    parser.add_argument("text", nargs="?")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.text:
+        print(get_coin_tagger().tag(args.text))
+    else:
+        counts = CoinIndex.load().coins()
+        for coin, n in sorted(counts.items(), key=lambda kv: -kv[1])[:args.top]:
+            print(f"{coin:30} {n}")
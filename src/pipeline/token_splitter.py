@@ -0,0 +1,94 @@
+import re
+from bisect import bisect_left, bisect_right
+from typing import List
+
+import tiktoken
+
+ENCODING_NAME = "cl100k_base"   # tokenizer of text-embedding-ada-002
+# Both patterns end right before the whitespace that separates two units, which is
+# where BPE tokens (" The", "\n\n") start.
+PARAGRAPH_RE = re.compile(r"\S(?=\n\s*\n)")
+SENTENCE_RE = re.compile(r"[.!?][\"')\]]*(?=\s)")
+
+
+class TokenBudgetSplitter:
+    """
+    Splits text into chunks of at most `chunk_tokens` tokens.
+    Each document is encoded once; cuts are placed on the last paragraph break,
+    else the last sentence end, inside the window, and the next chunk starts on
+    a sentence boundary roughly `overlap_tokens` before the cut.
+    """
+
+    def __init__(self, chunk_tokens=256, overlap_tokens=32, encoding_name=ENCODING_NAME,
+                 min_chunk_tokens=None, encoding=None):
+        if overlap_tokens >= chunk_tokens:
+            raise ValueError("❌ overlap_tokens must be smaller than chunk_tokens")
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        # never cut earlier than this inside a window, even if that is the only boundary
+        self.min_chunk_tokens = min_chunk_tokens or chunk_tokens // 2
+        self._encoding_name = encoding_name
+        self._encoding = encoding
+
+    @property
+    def encoding(self):
+        if self._encoding is None:
+            self._encoding = tiktoken.get_encoding(self._encoding_name)
+        return self._encoding
+
+    def _boundaries(self, text, offsets, pattern):
+        """Token indices at which a new paragraph / sentence starts."""
+        marks = []
+        for match in pattern.finditer(text):
+            idx = bisect_left(offsets, match.end())
+            if 0 < idx < len(offsets) and (not marks or marks[-1] != idx):
+                marks.append(idx)
+        return marks
+
+    @staticmethod
+    def _last_in(marks, lo, hi):
+        """Largest mark m with lo < m <= hi, or None."""
+        i = bisect_right(marks, hi) - 1
+        return marks[i] if i >= 0 and marks[i] > lo else None
+
+    @staticmethod
+    def _first_in(marks, lo, hi):
+        """Smallest mark m with lo <= m < hi, or None."""
+        i = bisect_left(marks, lo)
+        return marks[i] if i < len(marks) and marks[i] < hi else None
+
+    def split_text(self, text: str) -> List[str]:
+        tokens = self.encoding.encode(text, disallowed_special=())
+        if not tokens:
+            return []
+        if len(tokens) <= self.chunk_tokens:
+            return [text.strip()] if text.strip() else []
+
+        decoded, offsets = self.encoding.decode_with_offsets(tokens)
+        paragraphs = self._boundaries(decoded, offsets, PARAGRAPH_RE)
+        sentences = sorted(set(self._boundaries(decoded, offsets, SENTENCE_RE)) | set(paragraphs))
+
+        n = len(tokens)
+        chunks = []
+        start = 0
+        while start < n:
+            limit = start + self.chunk_tokens
+            if limit >= n:
+                end = n
+            else:
+                lo = start + self.min_chunk_tokens
+                end = (self._last_in(paragraphs, lo, limit)
+                       or self._last_in(sentences, lo, limit)
+                       or limit)
+
+            stop = offsets[end] if end < n else len(decoded)
+            chunk = decoded[offsets[start]:stop].strip()
+            if chunk:
+                chunks.append(chunk)
+            if end >= n:
+                break
+
+            overlap_start = end - self.overlap_tokens
+            next_start = self._first_in(sentences, overlap_start, end) or overlap_start
+            start = max(next_start, start + 1)
+        return chunks
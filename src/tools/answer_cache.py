@@ -0,0 +1,153 @@
+import os
+import re
+import time
+import pathlib
+import threading
+from collections import OrderedDict
+from typing import List
+
+import numpy as np
+
+try:
+    from langchain_core.embeddings import Embeddings
+except Exception:
+    from langchain.embeddings.base import Embeddings
+
+# File path here is .../src/tools/answer_cache.py
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+QUERY_LRU_SIZE = int(os.getenv("QUERY_LRU_SIZE", "2048"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "600"))             # seconds
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))  # cosine similarity
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+# Touched by every ingest run; answer caches in any process drop their entries when it changes
+INDEX_VERSION_FILE = pathlib.Path(os.getenv("INDEX_VERSION_FILE", str(REPO_ROOT / "cache" / "index_version")))
+
+def normalize_query(text: str) -> str:
+    """'  Update me on ETH?? ' -> 'update me on eth'"""
+    return re.sub(r"\s+", " ", text.lower()).strip(" ?!.")
+
+def bump_index_version():
+    """Invalidation hook for ingest scripts: call after the vector store changed."""
+    INDEX_VERSION_FILE.parent.mkdir(parents=True, exist_ok=True)
+    INDEX_VERSION_FILE.write_text(str(time.time()), encoding="utf-8")
+
+def _index_version():
+    try:
+        return INDEX_VERSION_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+class QueryEmbeddingLRU(Embeddings):
+    """
+    First cache level: in-memory LRU of normalised query text -> embedding.
+    The answer cache and the retriever both embed the same question, so
+    wrapping the retriever's embeddings with this makes the second call free.
+    """
+
+    def __init__(self, underlying, maxsize=QUERY_LRU_SIZE):
+        self.underlying = underlying
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed_query(self, text: str) -> List[float]:
+        key = normalize_query(text)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        vector = self.underlying.embed_query(text)
+        with self._lock:
+            self._entries[key] = vector
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.underlying.embed_documents(texts)
+
+    def __getattr__(self, name):
+        # expose stats() etc. of the wrapped (disk-cached) embeddings
+        return getattr(self.underlying, name)
+
+
+class SemanticAnswerCache:
+    """
+    Second cache level: stores finished answers keyed by the question's
+    embedding. A new question whose embedding is within `threshold` cosine
+    similarity of a fresh entry (same scope, e.g. the same coin) reuses
+    that answer and its sources instead of running retrieval + the LLM.
+    """
+
+    def __init__(self, threshold=ANSWER_CACHE_THRESHOLD, ttl=ANSWER_CACHE_TTL, max_entries=ANSWER_CACHE_SIZE):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._version = _index_version()
+        self.invalidate()
+
+    def invalidate(self):
+        with self._lock:
+            self._vectors = np.empty((0, 0), dtype=np.float32)
+            self._entries = []   # (created_at, scope, value), row-aligned with _vectors
+
+    def _check_version(self):
+        version = _index_version()
+        if version != self._version:
+            self._version = version
+            self.invalidate()
+
+    def _expire(self, now):
+        keep = [i for i, (created, _, _) in enumerate(self._entries) if now - created < self.ttl]
+        if len(keep) != len(self._entries):
+            self._entries = [self._entries[i] for i in keep]
+            self._vectors = self._vectors[keep]
+
+    @staticmethod
+    def _normalise(vector):
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+
+    def lookup(self, vector, scope=None):
+        self._check_version()
+        query = self._normalise(vector)
+        with self._lock:
+            self._expire(time.time())
+            if self._entries:
+                scores = self._vectors @ query
+                for row in np.argsort(-scores):
+                    if scores[row] < self.threshold:
+                        break
+                    if self._entries[row][1] == scope:
+                        self.hits += 1
+                        return self._entries[row][2]
+            self.misses += 1
+            return None
+
+    def store(self, vector, value, scope=None):
+        query = self._normalise(vector)
+        with self._lock:
+            if not self._entries:
+                self._vectors = query[None, :]
+            else:
+                self._vectors = np.vstack([self._vectors, query])
+            self._entries.append((time.time(), scope, value))
+            if len(self._entries) > self.max_entries:
+                self._entries = self._entries[1:]
+                self._vectors = self._vectors[1:]
+
+    def get_or_compute(self, vector, compute, scope=None):
+        cached = self.lookup(vector, scope)
+        if cached is not None:
+            return cached
+        value = compute()
+        self.store(vector, value, scope)
+        return value
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
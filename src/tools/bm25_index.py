@@ -0,0 +1,151 @@
+import os
+import re
+import json
+import pathlib
+from typing import List
+
+import numpy as np
+
+from tools.metadata_index import MetadataIndex
+
+try:
+    from langchain_core.documents import Document
+except Exception:
+    from langchain.schema import Document
+
+# File path here is .../src/tools/bm25_index.py
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+BM25_INDEX_DIR = os.getenv("BM25_INDEX_DIR", str(REPO_ROOT / "bm25_index"))
+POSTINGS_FILE = "postings.npz"
+TERMS_FILE = "terms.json"
+DOCS_FILE = "docs.jsonl"
+K1 = 1.2
+B = 0.75
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-.'][a-z0-9]+)*")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "did", "do", "does", "for", "from",
+    "has", "have", "how", "i", "in", "is", "it", "its", "of", "on", "or", "s", "say", "said",
+    "so", "that", "the", "their", "there", "this", "to", "was", "we", "what", "whats", "when",
+    "which", "who", "will", "with", "you", "about",
+}
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased word tokens. Compound tokens are kept whole *and* split, so
+    'EIP-4844' matches queries for 'eip-4844', 'eip 4844' or '4844'.
+    """
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        if token not in STOPWORDS:
+            tokens.append(token)
+        parts = re.split(r"[-.']", token)
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if p and p not in STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a compact inverted index stored as CSR arrays:
+    term t's postings are doc_ids[offsets[t]:offsets[t+1]] with matching tfs.
+    Runs fully locally - no embedding call needed to answer a query.
+    """
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        arrays = np.load(self.path / POSTINGS_FILE)
+        self.offsets = arrays["offsets"]
+        self.doc_ids = arrays["doc_ids"]
+        self.tfs = arrays["tfs"]
+        self.doc_len = arrays["doc_len"]
+        self.avgdl = float(self.doc_len.mean()) if len(self.doc_len) else 0.0
+        with open(self.path / TERMS_FILE, "r", encoding="utf-8") as f:
+            self.term_ids = {t: i for i, t in enumerate(json.load(f))}
+        self.ids, self.texts, self.metadatas = [], [], []
+        with open(self.path / DOCS_FILE, "r", encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                self.ids.append(row["id"])
+                self.texts.append(row["text"])
+                self.metadatas.append(row["metadata"])
+        self.meta_index = MetadataIndex.load(self.path, self.metadatas)
+        n = len(self.ids)
+        df = np.diff(self.offsets).astype(np.float32)
+        self.idf = np.log1p((n - df + 0.5) / (df + 0.5))
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, path, docs):
+        """Index an iterable of (id, text, metadata) and write it to `path`."""
+        path = pathlib.Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        vocab = {}
+        postings = []   # per term: list of (doc, tf)
+        doc_len = []
+        metadatas = []
+        with open(path / DOCS_FILE, "w", encoding="utf-8") as f:
+            for row, (doc_id, text, metadata) in enumerate(docs):
+                metadatas.append(metadata or {})
+                f.write(json.dumps({"id": doc_id, "text": text, "metadata": metadata or {}}, ensure_ascii=False))
+                f.write("\n")
+                counts = {}
+                tokens = tokenize(text)
+                for token in tokens:
+                    counts[token] = counts.get(token, 0) + 1
+                for token, tf in counts.items():
+                    if token not in vocab:
+                        vocab[token] = len(vocab)
+                        postings.append([])
+                    postings[vocab[token]].append((row, tf))
+                doc_len.append(len(tokens))
+
+        offsets = np.zeros(len(postings) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(p) for p in postings])
+        doc_ids = np.fromiter((d for p in postings for d, _ in p), dtype=np.int32, count=offsets[-1])
+        tfs = np.fromiter((min(tf, 65535) for p in postings for _, tf in p), dtype=np.uint16, count=offsets[-1])
+        np.savez(path / POSTINGS_FILE, offsets=offsets, doc_ids=doc_ids, tfs=tfs,
+                 doc_len=np.asarray(doc_len, dtype=np.float32))
+        with open(path / TERMS_FILE, "w", encoding="utf-8") as f:
+            json.dump(sorted(vocab, key=vocab.get), f, ensure_ascii=False)
+        MetadataIndex.build(metadatas).save(path)
+        return cls(path)
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        norm = K1 * (1 - B + B * self.doc_len / (self.avgdl or 1.0))
+        for token in set(tokenize(query)):
+            term = self.term_ids.get(token)
+            if term is None:
+                continue
+            start, end = self.offsets[term], self.offsets[term + 1]
+            docs = self.doc_ids[start:end]
+            tf = self.tfs[start:end].astype(np.float32)
+            scores[docs] += self.idf[term] * tf * (K1 + 1) / (tf + norm[docs])
+        return scores
+
+    def search_rows(self, query: str, k=4, filter=None):
+        """Return [(row, bm25 score)] of the k best matching rows, best first."""
+        scores = self.scores(query)
+        rows = self.meta_index.candidates(filter)
+        hits = np.flatnonzero(scores) if rows is None else rows[scores[rows] > 0]
+        if len(hits) == 0:
+            return []
+        k = min(k, len(hits))
+        top = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(int(r), float(scores[r])) for r in top]
+
+    def search(self, query: str, k=4, filter=None) -> List[Document]:
+        return [
+            Document(page_content=self.texts[r], metadata=dict(self.metadatas[r]))
+            for r, _ in self.search_rows(query, k, filter)
+        ]
+
+def load_bm25_index(path=BM25_INDEX_DIR):
+    """The prebuilt index, or None when pipeline/build_bm25_index.py has not been run yet."""
+    if not (pathlib.Path(path) / POSTINGS_FILE).exists():
+        return None
+    return BM25Index(path)
@@ -0,0 +1,243 @@
+import os
+import re
+import json
+import pathlib
+import threading
+from typing import Dict, Iterable, List
+
+# File path here is .../src/tools/coin_matcher.py
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+COIN_INDEX_PATH = os.getenv("COIN_INDEX_PATH", str(REPO_ROOT / "coin_index.json"))
+
+WORD_RE = re.compile(r"\$?[A-Za-z0-9]+(?:[-.'][A-Za-z0-9]+)*")
+# Longest coin name we try to match, in words ("Wrapped Bitcoin", "Shiba Inu", "USD Coin")
+MAX_PATTERN_WORDS = 4
+# Short keys are usually tickers; outside MAJOR_TICKERS they only count when $-prefixed ("$pendle")
+SYMBOL_MAX_LEN = 5
+# Tickers unambiguous enough to match in any case
+CASE_INSENSITIVE_SYMBOLS = {"btc", "eth", "xrp", "usdt", "usdc", "bnb", "doge", "ada", "matic"}
+# Tickers of the largest coins by market cap: they also count when written UPPERCASE ("ARB", "OP")
+# and win over whichever coin COIN_MAP happens to map the same symbol to
+MAJOR_TICKERS = {
+    "btc": "bitcoin", "eth": "ethereum", "usdt": "tether", "bnb": "binancecoin", "sol": "solana",
+    "usdc": "usd-coin", "xrp": "ripple", "doge": "dogecoin", "ada": "cardano", "trx": "tron",
+    "avax": "avalanche-2", "shib": "shiba-inu", "ton": "the-open-network", "dot": "polkadot",
+    "link": "chainlink", "bch": "bitcoin-cash", "near": "near", "ltc": "litecoin",
+    "matic": "matic-network", "pol": "polygon-ecosystem-token", "uni": "uniswap",
+    "icp": "internet-computer", "dai": "dai", "apt": "aptos", "etc": "ethereum-classic",
+    "xlm": "stellar", "xmr": "monero", "okb": "okb", "atom": "cosmos", "fil": "filecoin",
+    "hbar": "hedera-hashgraph", "arb": "arbitrum", "op": "optimism", "imx": "immutable-x",
+    "vet": "vechain", "inj": "injective-protocol", "mkr": "maker", "rndr": "render-token",
+    "grt": "the-graph", "aave": "aave", "algo": "algorand", "sui": "sui", "sei": "sei-network",
+    "stx": "blockstack", "tia": "celestia", "pepe": "pepe", "wif": "dogwifcoin", "bonk": "bonk",
+    "ftm": "fantom", "egld": "elrond-erd-2", "sand": "the-sandbox", "mana": "decentraland",
+    "axs": "axie-infinity", "kas": "kaspa", "ldo": "lido-dao", "crv": "curve-dao-token",
+    "snx": "havven", "xtz": "tezos", "eos": "eos", "theta": "theta-token", "qnt": "quant-network",
+    "rune": "thorchain", "jup": "jupiter-exchange-solana", "ena": "ethena", "wld": "worldcoin-wld",
+    "ondo": "ondo-finance", "fet": "fetch-ai", "hype": "hyperliquid",
+}
+# Quote currencies; never read as coin tickers ("USD" is not a coin even if some token uses it)
+FIAT_CURRENCIES = ("usd", "eur", "gbp", "jpy", "aud", "cad", "chf", "cny", "inr", "krw", "brl", "sgd", "hkd")
+# Acronyms that share a ticker with some coin ("SEC", "ETF", "AI"); only tagged when $-prefixed
+COMMON_ACRONYMS = {
+    "ai", "ama", "aml", "api", "apr", "apy", "ath", "atl", "bank", "ceo", "cex", "cpi", "dao", "dca",
+    "defi", "dex", "dyor", "etf", "eu", "evm", "faq", "fed", "fomc", "fomo", "fud", "gdp", "hodl",
+    "ico", "imo", "ipo", "irs", "kyc", "l1", "l2", "lol", "nft", "ok", "omg", "otc", "p2p", "pos",
+    "pow", "qe", "roi", "sec", "tbh", "tldr", "tvl", "uk", "usa", "vs", "wtf",
+}
+COMMON_WORDS = {
+    "a", "about", "all", "am", "an", "and", "any", "are", "as", "at", "back", "be", "best", "big",
+    "bit", "book", "but", "buy", "by", "can", "cash", "cat", "chain", "coin", "crypto", "data",
+    "day", "dog", "earn", "eth2", "ever", "for", "fun", "game", "gas", "get", "go", "gold", "good",
+    "has", "have", "hello", "help", "high", "hold", "home", "how", "i", "if", "in", "is", "it",
+    "just", "key", "life", "like", "link", "live", "long", "love", "low", "make", "market", "max",
+    "me", "meme", "money", "moon", "more", "most", "my", "near", "new", "next", "no", "not", "now",
+    "of", "on", "one", "open", "or", "out", "over", "pay", "people", "play", "point", "power",
+    "pump", "rain", "real", "safe", "sell", "so", "sol", "space", "star", "step", "sun", "super",
+    "swap", "that", "the", "this", "time", "to", "token", "top", "trade", "true", "up", "us",
+    "value", "via", "we", "what", "when", "which", "will", "win", "with", "work", "world", "you",
+}
+
+def _words(text: str):
+    """(start, end, word) for each word, offsets into the original string."""
+    return [(m.start(), m.end(), m.group()) for m in WORD_RE.finditer(text)]
+
+
+class KeywordTrie:
+    """
+    Multi-pattern matcher over word sequences: one dict-of-dicts trie keyed by
+    lowercased words, scanned once per text with a leftmost-longest match at
+    each word. Cost is O(words x longest pattern), independent of how many
+    patterns (tens of thousands of coin names/tickers) are loaded.
+    """
+
+    _END = "\0"
+
+    def __init__(self):
+        self.root = {}
+        self.size = 0
+
+    def add(self, words: List[str], value):
+        node = self.root
+        for word in words:
+            node = node.setdefault(word, {})
+        if self._END not in node:
+            self.size += 1
+        node[self._END] = value
+
+    def scan(self, words: List[str]):
+        """Yield (first word index, word count, value) for each non-overlapping match."""
+        i = 0
+        while i < len(words):
+            node, best = self.root, None
+            for j in range(i, min(i + MAX_PATTERN_WORDS, len(words))):
+                node = node.get(words[j])
+                if node is None:
+                    break
+                if self._END in node:
+                    best = (j - i + 1, node[self._END])
+            if best:
+                yield i, best[0], best[1]
+                i += best[0]
+            else:
+                i += 1
+
+
+# How a coin key has to be written in the text to count as a mention
+MATCH_ANY, MATCH_UPPER, MATCH_DOLLAR = 0, 1, 2
+
+def coin_patterns(coin_map: Dict[str, str], overrides: Dict[str, str] = None):
+    """
+    (words, coin id, match mode) for every key of a symbol/name/id -> id map,
+    then MAJOR_TICKERS and `overrides`, later entries winning. Names, ids and
+    CASE_INSENSITIVE_SYMBOLS match in any case (MATCH_ANY), major tickers
+    also as UPPERCASE (MATCH_UPPER), every other short ticker, English word
+    or acronym only $-prefixed (MATCH_DOLLAR). Fiat codes are skipped.
+    """
+    entries = list(coin_map.items()) + list(MAJOR_TICKERS.items()) + list((overrides or {}).items())
+    for key, coin_id in entries:
+        words = [w.lstrip("$").lower() for _, _, w in _words(key)]
+        if not words or len(words) > MAX_PATTERN_WORDS or (len(words) == 1 and len(words[0]) < 2):
+            continue
+        key = words[0]
+        if len(words) > 1 or key in CASE_INSENSITIVE_SYMBOLS:
+            mode = MATCH_ANY
+        elif key in FIAT_CURRENCIES:
+            continue
+        elif key in MAJOR_TICKERS:
+            mode = MATCH_UPPER
+        elif key in COMMON_WORDS or key in COMMON_ACRONYMS or (len(key) <= SYMBOL_MAX_LEN and key != coin_id):
+            mode = MATCH_DOLLAR
+        else:
+            mode = MATCH_ANY
+        yield words, coin_id, mode
+
+def accept_mention(raw: str, mode: int) -> bool:
+    """Whether the word as written (`raw`, with any "$") satisfies the pattern's match mode."""
+    if mode == MATCH_ANY or raw.startswith("$"):
+        return True
+    return mode == MATCH_UPPER and raw.isupper() and len(raw) > 1
+
+
+class CoinTagger:
+    """
+    Finds the CoinGecko ids a text talks about. Built from a symbol/name/id ->
+    id map (coingecko_tool.COIN_MAP) with `overrides` taking precedence.
+    """
+
+    def __init__(self, coin_map: Dict[str, str], overrides: Dict[str, str] = None):
+        self.trie = KeywordTrie()
+        # pattern value: (coin id, match mode)
+        for words, coin_id, mode in coin_patterns(coin_map, overrides):
+            self.trie.add(words, (coin_id, mode))
+
+    def __len__(self):
+        return self.trie.size
+
+    def mentions(self, text: str) -> List[str]:
+        """CoinGecko ids mentioned in `text`, de-duplicated, in order of first mention."""
+        spans = _words(text or "")
+        words = [w.lstrip("$").lower() for _, _, w in spans]
+        found = {}
+        for i, n, (coin_id, mode) in self.trie.scan(words):
+            if accept_mention(spans[i][2], mode):
+                found.setdefault(coin_id, None)
+        return list(found)
+
+    def tag(self, text: str) -> List[str]:
+        """Sorted, de-duplicated CoinGecko ids mentioned in `text`."""
+        return sorted(self.mentions(text))
+
+_tagger = None
+_tagger_lock = threading.Lock()
+
+_tagger_version = None
+
+def get_coin_tagger() -> CoinTagger:
+    """
+    Process-wide tagger over COIN_MAP; built on first use (a few hundred ms)
+    and rebuilt after COIN_MAP swaps in a refreshed coin list.
+    """
+    global _tagger, _tagger_version
+    from tools.coingecko_tool import COIN_MAP, _OVERRIDES
+    with _tagger_lock:
+        COIN_MAP.get("")  # loads the map (or kicks off a refresh) before the version check
+        if _tagger is None or _tagger_version != COIN_MAP.version:
+            _tagger = CoinTagger(COIN_MAP, _OVERRIDES)
+            _tagger_version = COIN_MAP.version
+        return _tagger
+
+
+# === COIN -> CHUNK POSTINGS ===
+class CoinIndex:
+    """
+    Persisted coin -> chunk-id posting lists, kept per ingest stage so each
+    stage (articles+reddit, transcripts) can rewrite its own part.
+
+    File layout: {"stages": {stage: {coin_id: [chunk_id, ...]}}}
+    """
+
+    def __init__(self, path=COIN_INDEX_PATH, stages=None):
+        self.path = pathlib.Path(path)
+        self.stages = stages or {}
+
+    @classmethod
+    def load(cls, path=COIN_INDEX_PATH):
+        path = pathlib.Path(path)
+        if not path.exists():
+            return cls(path)
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(path, json.load(f).get("stages", {}))
+
+    def set_stage(self, stage: str, postings: Dict[str, List[str]]):
+        self.stages[stage] = {coin: sorted(set(ids)) for coin, ids in postings.items()}
+        return self
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"stages": self.stages}, f)
+        os.replace(tmp, self.path)
+
+    def chunk_ids(self, coins: Iterable[str]) -> List[str]:
+        """Chunk ids mentioning any of `coins`, across all stages."""
+        ids = set()
+        for postings in self.stages.values():
+            for coin in coins:
+                ids.update(postings.get(coin, ()))
+        return sorted(ids)
+
+    def coins(self) -> Dict[str, int]:
+        """coin id -> number of chunks mentioning it."""
+        counts = {}
+        for postings in self.stages.values():
+            for coin, ids in postings.items():
+                counts[coin] = counts.get(coin, 0) + len(ids)
+        return counts
+
+def load_coin_index(path=COIN_INDEX_PATH):
+    """The persisted index, or None when no ingest stage has written one yet."""
+    if not pathlib.Path(path).exists():
+        return None
+    return CoinIndex.load(path)
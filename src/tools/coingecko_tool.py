@@ -1,33 +1,166 @@
 from langchain.tools import Tool
-import requests
 import re
-
-# ⚙️ One-time download and normalized cache
+import os
+import json
+import time
+import pathlib
+import threading
+from collections.abc import Mapping
+
+from tools.http_client import get_coingecko_client
+from tools.price_service import price_service, format_quote, price_table, format_price_table, PriceUnavailable
+from tools.query_router import route_query
+
+# File path here is .../src/tools/coingecko_tool.py
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+COIN_LIST_CACHE = pathlib.Path(os.getenv("COIN_LIST_CACHE", str(REPO_ROOT / "cache" / "coingecko_coins.json")))
+# Age after which the cached list is refreshed in the background (it is still served meanwhile)
+COIN_LIST_TTL = int(os.getenv("COIN_LIST_TTL", str(24 * 3600)))
+# After a failed refresh, wait this long before trying again
+COIN_LIST_RETRY = 300
+# Staleness (a stat() of the cache file) is checked at most this often, not on every lookup
+STALE_CHECK_INTERVAL = 60
+
+def fetch_coin_list():
+    coins = get_coingecko_client().get_json("/coins/list")
+    print(f"✅ Retrieved {len(coins)} coins from CoinGecko")
+    return coins
+
+def coin_map_from_list(coins):
+    """Normalize /coins/list entries into {id|symbol|name (lowercase): id}."""
+    coin_map = {}
+    for coin in coins:
+        cid = (coin.get("id") or "").strip()
+        sym = (coin.get("symbol") or "").strip()
+        name = (coin.get("name") or "").strip()
+        if not cid:
+            continue
+        coin_map[cid.lower()] = cid
+        if sym:
+            coin_map[sym.lower()] = cid
+        if name:
+            coin_map[name.lower()] = cid
+    return coin_map
+
+# ⚙️ One-time download and normalized map
 def build_coin_map():
-    url = "https://api.coingecko.com/api/v3/coins/list"
     try:
-        response = requests.get(url, timeout=15)
-        response.raise_for_status()
-        coins = response.json()
-        print(f"✅ Retrieved {len(coins)} coins from CoinGecko")
-        coin_map = {}
-        for coin in coins:
-            cid = (coin.get("id") or "").strip()
-            sym = (coin.get("symbol") or "").strip()
-            name = (coin.get("name") or "").strip()
-            if not cid:
-                continue
-            coin_map[cid.lower()] = cid
-            if sym:
-                coin_map[sym.lower()] = cid
-            if name:
-                coin_map[name.lower()] = cid
-        return coin_map
+        return coin_map_from_list(fetch_coin_list())
     except Exception as e:
         print("❌ Failed to fetch CoinGecko coin list:", e)
         return {}
 
-COIN_MAP = build_coin_map()
+
+class LazyCoinMap(Mapping):
+    """
+    Read-only {symbol|name|id: id} map backed by a disk copy of /coins/list.
+    Nothing is fetched at import: the first lookup loads the cached file, and
+    a stale (older than COIN_LIST_TTL) or failed list is refreshed in a
+    background thread while callers keep using what is loaded. Only the very
+    first run, with no cache file at all, waits for the download.
+    """
+
+    def __init__(self, cache_path=COIN_LIST_CACHE, ttl=COIN_LIST_TTL):
+        self.cache_path = pathlib.Path(cache_path)
+        self.ttl = ttl
+        self.version = 0          # bumped on every successful (re)load
+        self._map = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._next_attempt = 0.0
+        self._next_check = 0.0    # time.monotonic() of the next staleness check
+
+    # === LOADING ===
+    def _ensure_loaded(self):
+        if self._map is not None:
+            self._maybe_refresh()
+            return self._map
+        with self._lock:
+            if self._map is None:
+                if self.cache_path.exists():
+                    self._set(self._read_cache())
+                elif not self._refresh_once():
+                    self._set({})
+        self._maybe_refresh()
+        return self._map
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return coin_map_from_list(json.load(f))
+        except Exception as e:
+            print("⚠ Unreadable CoinGecko cache, refetching:", e)
+            return {}
+
+    def _set(self, coin_map):
+        self._map = coin_map
+        self.version += 1
+
+    def _is_stale(self):
+        if not self._map or not self.cache_path.exists():
+            return True
+        return time.time() - self.cache_path.stat().st_mtime > self.ttl
+
+    def _refresh_once(self):
+        """Download, write the cache atomically and swap the map in; False on failure."""
+        try:
+            coins = fetch_coin_list()
+        except Exception as e:
+            print("❌ Failed to fetch CoinGecko coin list:", e)
+            self._next_attempt = time.time() + COIN_LIST_RETRY
+            return False
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(coins, f)
+        os.replace(tmp, self.cache_path)
+        self._set(coin_map_from_list(coins))
+        return True
+
+    def _maybe_refresh(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + STALE_CHECK_INTERVAL
+        if self._refreshing or time.time() < self._next_attempt or not self._is_stale():
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, name="coin-list-refresh", daemon=True).start()
+
+    def _background_refresh(self):
+        try:
+            self._refresh_once()
+        finally:
+            self._refreshing = False
+
+    def refresh(self):
+        """Force a synchronous re-download (e.g. from a maintenance job)."""
+        return self._refresh_once()
+
+    # === MAPPING ===
+    def __getitem__(self, key):
+        return self._ensure_loaded()[key]
+
+    def __iter__(self):
+        return iter(self._ensure_loaded())
+
+    def __len__(self):
+        return len(self._ensure_loaded())
+
+    def __contains__(self, key):
+        return key in self._ensure_loaded()
+
+    def get(self, key, default=None):
+        return self._ensure_loaded().get(key, default)
+
+    def items(self):
+        # one load check for the whole walk (router/tagger rebuilds), not one per key
+        return self._ensure_loaded().items()
+
+COIN_MAP = LazyCoinMap()
 
 _OVERRIDES = {
     "eth": "ethereum",
@@ -54,55 +187,54 @@ def _sanitize_to_tokens(text: str):
     tokens = re.split(r"[^a-z0-9\-]+", s)
     return [t for t in tokens if t]
 
-def get_coin_id(query: str) -> str:
-    tokens = _sanitize_to_tokens(query)
-
-    # 1) fast path: overrides
-    for t in tokens:
-        if t in _OVERRIDES:
-            return _OVERRIDES[t]
-
-    # 2) direct map lookup for any token
-    for t in tokens:
-        if t in COIN_MAP:
-            return COIN_MAP[t]
+def get_coin_ids(query: str) -> list:
+    """
+    Every coin a question mentions, in order of first mention ("Compare BTC,
+    ETH and SOL", "shiba inu price"), via the shared query router. Bare tool
+    inputs the router leaves alone ("'pepe'") are looked up whole in COIN_MAP.
+    """
+    ids = route_query(query).coins
+    if not ids:
+        tokens = _sanitize_to_tokens(query)
+        whole = " ".join(tokens)
+        if whole in COIN_MAP:
+            ids = [COIN_MAP[whole]]
+    return ids
 
-    # 3) fall back to the whole sanitized string if single token
-    if len(tokens) == 1 and tokens[0] in COIN_MAP:
-        return COIN_MAP[tokens[0]]
+def get_coin_id(query: str) -> str:
+    ids = get_coin_ids(query)
+    return ids[0] if ids else ""
 
-    return ""
+def parse_currencies(query: str) -> list:
+    """Quote currencies asked for, USD when none are named."""
+    return route_query(query).currencies
 
 def get_crypto_price(query: str) -> str:
-    coin_id = get_coin_id(query)
-    if not coin_id:
+    coin_ids = get_coin_ids(query)
+    if not coin_ids:
         return f"❌ Couldn't find a coin called '{query}'. Try using the full name or symbol like 'Bitcoin' or 'BTC'."
 
-    url = "https://api.coingecko.com/api/v3/simple/price"
-    params = {
-        "ids": coin_id,
-        "vs_currencies": "usd",
-        "include_24hr_change": "true",
-    }
+    currencies = parse_currencies(query)
+    if len(coin_ids) > 1 or currencies != ["usd"]:
+        # All coins x currencies in one /simple/price call
+        return format_price_table(price_table(coin_ids, currencies))
 
-    try:
-        response = requests.get(url, params=params, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-    except Exception as e:
-        return f"❌ CoinGecko request error: {e}"
-
-    price_info = data.get(coin_id, {})
-    price = price_info.get("usd")
-    change = price_info.get("usd_24h_change", 0.0)
+    coin_id = coin_ids[0]
 
-    if price is None or price == 0:
-        return f"⚠️ Could not retrieve a valid USD price for '{query}'. Please try again later."
+    # Shared TTL cache + singleflight; serves a recent quote if CoinGecko is erroring
+    try:
+        quote = price_service.get_quote(coin_id, "usd")
+    except PriceUnavailable as e:
+        return f"⚠️ Could not retrieve a valid USD price for '{query}' ({e}). Please try again later."
 
-    return f"The current price of {coin_id.upper()} is ${price:.2f} (24h change: {change:.2f}%)."
+    return f"The current price of {coin_id.upper()} is {format_quote(quote)}."
 
 coingecko_tool = Tool(
     name="CoinGeckoPriceFetcher",
     func=get_crypto_price,
-    description="Use this to get current prices and 24h change for any cryptocurrency. Input can be a coin name or symbol like 'ETH', 'Solana', or 'Shiba Inu'.",
+    description=(
+        "Use this to get current prices and 24h change for one or more cryptocurrencies. Input can be coin names "
+        "or symbols like 'ETH', 'Solana', or 'Shiba Inu', several at once ('BTC, ETH and SOL') and optionally "
+        "quote currencies ('in EUR and GBP'). Several coins or currencies come back as a table."
+    ),
 )
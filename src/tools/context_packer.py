@@ -0,0 +1,131 @@
+import os
+import functools
+from typing import Any, List, Optional
+
+try:
+    from langchain_core.documents import Document
+    from langchain_core.retrievers import BaseRetriever
+except Exception:
+    from langchain.schema import Document, BaseRetriever
+
+# Tokens of retrieved text handed to the LLM per question, whatever k is
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+CONTEXT_MODEL = os.getenv("CONTEXT_MODEL", "gpt-4o")
+# Rough cost of the per-source header lines (title, url, source) in the prompt
+SOURCE_OVERHEAD_TOKENS = 24
+# Neighbouring chunks share up to CHUNK_OVERLAP characters; overlaps shorter than this are coincidence
+MIN_OVERLAP_CHARS = 20
+MAX_OVERLAP_CHARS = 400
+# A chunk that does not fit is cut to the remaining budget only if at least this much is left
+MIN_PARTIAL_TOKENS = 64
+GAP_MARKER = "\n[...]\n"
+
+@functools.lru_cache(maxsize=4)
+def get_encoding(model: str = CONTEXT_MODEL):
+    import tiktoken
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+def count_tokens(text: str, model: str = CONTEXT_MODEL) -> int:
+    return len(get_encoding(model).encode(text, disallowed_special=()))
+
+def truncate_tokens(text: str, max_tokens: int, model: str = CONTEXT_MODEL) -> str:
+    enc = get_encoding(model)
+    tokens = enc.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else enc.decode(tokens[:max_tokens]).rstrip() + " ..."
+
+def group_key(doc) -> str:
+    """Chunks of the same article, Reddit post or video collapse into one source."""
+    meta = doc.metadata or {}
+    return meta.get("url") or meta.get("video_id") or meta.get("title") or doc.page_content[:64]
+
+def chunk_position(meta: dict) -> Optional[int]:
+    """Index of the chunk within its source: every ingest path stores it as the int "chunk_id"."""
+    value = meta.get("chunk_id")
+    if isinstance(value, int):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def strip_overlap(previous: str, text: str) -> Optional[str]:
+    """
+    The rest of `text` after the head that repeats the tail of `previous`
+    (splitter chunk overlap), or None when they do not overlap.
+    """
+    limit = min(len(previous), len(text), MAX_OVERLAP_CHARS)
+    for size in range(limit, MIN_OVERLAP_CHARS - 1, -1):
+        if previous.endswith(text[:size]):
+            return text[size:]
+    return None
+
+def join_chunks(chunks: List[Document]) -> str:
+    """Stitch one source's chunks in document order; adjacent overlaps are written once."""
+    ordered = sorted(chunks, key=lambda d: (chunk_position(d.metadata or {}) is None,
+                                            chunk_position(d.metadata or {}) or 0))
+    text = ""
+    for doc in ordered:
+        part = (doc.page_content or "").strip()
+        if not text:
+            text = part
+            continue
+        if part in text:
+            continue
+        rest = strip_overlap(text, part)
+        text = text + rest if rest is not None else text + GAP_MARKER + part
+    return text
+
+
+def pack_context(docs: List[Document], budget_tokens: int = CONTEXT_TOKEN_BUDGET,
+                 model: str = CONTEXT_MODEL) -> List[Document]:
+    """
+    Turn ranked chunks (best first) into at most `budget_tokens` of context:
+    chunks from the same URL/video are merged into one Document with their
+    overlap removed, and chunks are admitted in score order while their
+    marginal token cost still fits. Sources come back in order of their best
+    chunk; metadata is the best chunk's plus "chunks" (how many were merged).
+    """
+    groups, order = {}, []   # key -> admitted chunks, keys by best rank
+    texts, used = {}, 0
+    for doc in docs:
+        key = group_key(doc)
+        chunks = groups.get(key, []) + [doc]
+        text = join_chunks(chunks)
+        cost = count_tokens(text, model) + (0 if key in groups else SOURCE_OVERHEAD_TOKENS)
+        if key in groups:
+            cost -= count_tokens(texts[key], model)
+        if used + cost <= budget_tokens:
+            if key not in groups:
+                order.append(key)
+            groups[key], texts[key] = chunks, text
+            used += cost
+            continue
+        remaining = budget_tokens - used - SOURCE_OVERHEAD_TOKENS
+        if key not in groups and remaining >= MIN_PARTIAL_TOKENS:
+            # best remaining chunk is too long: keep its head rather than nothing
+            order.append(key)
+            groups[key], texts[key] = [doc], truncate_tokens(text, remaining, model)
+            used = budget_tokens
+    packed = []
+    for key in order:
+        best = groups[key][0]
+        packed.append(Document(page_content=texts[key], metadata={**(best.metadata or {}), "chunks": len(groups[key])}))
+    return packed
+
+
+class PackedRetriever(BaseRetriever):
+    """
+    Wraps any retriever so chains (RetrievalQA) receive packed, token-budgeted
+    context instead of k raw chunks.
+    """
+
+    base: Any
+    budget_tokens: int = CONTEXT_TOKEN_BUDGET
+    model: str = CONTEXT_MODEL
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        docs = self.base.invoke(query) if hasattr(self.base, "invoke") else self.base.get_relevant_documents(query)
+        return pack_context(docs, self.budget_tokens, self.model)
@@ -0,0 +1,188 @@
+import os
+import time
+import sqlite3
+import hashlib
+import pathlib
+import threading
+from array import array
+from typing import List
+
+try:
+    from langchain_core.embeddings import Embeddings
+except Exception:
+    from langchain.embeddings.base import Embeddings
+
+# File path here is .../src/tools/embedding_cache.py
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", str(REPO_ROOT / "cache" / "embeddings.sqlite"))
+EMBEDDING_CACHE_MAX_MB = float(os.getenv("EMBEDDING_CACHE_MAX_MB", "1024"))
+DEFAULT_MODEL = "text-embedding-ada-002"
+
+# Once the cache grows past its limit, evict least-recently-used rows down to this fraction
+EVICT_TO_FRACTION = 0.9
+
+def _pack(vector) -> bytes:
+    return array("f", vector).tobytes()
+
+def _unpack(blob: bytes) -> List[float]:
+    vec = array("f")
+    vec.frombytes(blob)
+    return vec.tolist()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper backed by an on-disk SQLite cache.
+    Vectors are keyed on model name + SHA-256 of the text and stored as raw
+    float32 blobs. Only texts that miss the cache reach the wrapped model.
+    """
+
+    def __init__(self, underlying, model_name=None, path=EMBEDDING_CACHE_PATH,
+                 max_bytes=int(EMBEDDING_CACHE_MAX_MB * 1024 * 1024)):
+        self.underlying = underlying
+        self.model_name = model_name or getattr(underlying, "model", None) or DEFAULT_MODEL
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, vector BLOB NOT NULL,"
+            " nbytes INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings(last_used)")
+        self._conn.commit()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    # === SQLITE ACCESS ===
+    def _lookup(self, keys):
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            # stay well below SQLite's bound-parameter limit
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                marks = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", batch
+                ).fetchall()
+                found.update((k, _unpack(v)) for k, v in rows)
+                if rows:
+                    self._conn.execute(
+                        f"UPDATE embeddings SET last_used = ? WHERE key IN ({marks})",
+                        [time.time(), *batch],
+                    )
+            self._conn.commit()
+        return found
+
+    def _store(self, items):
+        now = time.time()
+        rows = []
+        for key, vector in items:
+            blob = _pack(vector)
+            rows.append((key, blob, len(blob), now))
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+            self._conn.commit()
+            self._evict()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM embeddings").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - int(self.max_bytes * EVICT_TO_FRACTION)
+        freed = 0
+        stale = []
+        for key, nbytes in self._conn.execute("SELECT key, nbytes FROM embeddings ORDER BY last_used"):
+            stale.append((key,))
+            freed += nbytes
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", stale)
+        self._conn.commit()
+
+    # === EMBEDDINGS INTERFACE ===
+    def _split(self, texts):
+        keys = [self._key(t) for t in texts]
+        found = self._lookup(keys)
+        # identical texts inside one batch are only embedded once
+        missing = {}
+        for text, key in zip(texts, keys):
+            if key not in found:
+                missing.setdefault(key, text)
+        self.hits += len(texts) - sum(1 for k in keys if k not in found)
+        self.misses += len(missing)
+        return keys, found, missing
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._split(texts)
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self._store(fresh.items())
+            found.update(fresh)
+        return [found[k] for k in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        keys, found, missing = self._split([text])
+        if missing:
+            vector = self.underlying.embed_query(text)
+            self._store([(keys[0], vector)])
+            return vector
+        return found[keys[0]]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._split(texts)
+        if missing:
+            vectors = await self.underlying.aembed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self._store(fresh.items())
+            found.update(fresh)
+        return [found[k] for k in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM embeddings"
+            ).fetchone()
+        total = self.hits + self.misses
+        return {
+            "model": self.model_name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+# === SHARED INSTANCES ===
+_instances = {}
+_instances_lock = threading.Lock()
+
+def get_embeddings(model: str = DEFAULT_MODEL, **kwargs) -> CachedEmbeddings:
+    """
+    Return the process-wide cached OpenAI embeddings for `model` and these
+    client options (api_key, chunk_size, ...); different options get their
+    own client. Every pipeline and tool should build its embeddings through
+    here so they all share one on-disk cache.
+    """
+    # repr: option values may be unhashable (e.g. default_headers dicts)
+    key = (model, repr(sorted(kwargs.items())))
+    with _instances_lock:
+        if key not in _instances:
+            try:
+                from langchain_openai import OpenAIEmbeddings
+            except Exception:
+                from langchain_community.embeddings import OpenAIEmbeddings
+            _instances[key] = CachedEmbeddings(OpenAIEmbeddings(model=model, **kwargs), model_name=model)
+        return _instances[key]
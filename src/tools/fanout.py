@@ -0,0 +1,127 @@
+import os
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+# Per-branch budgets for the hybrid (price + analysis) answer path
+PRICE_TIMEOUT = float(os.getenv("PRICE_TIMEOUT", "5"))
+ANALYSIS_TIMEOUT = float(os.getenv("ANALYSIS_TIMEOUT", "60"))
+
+# Shared by every request in the process; branches are I/O bound (CoinGecko, embeddings, LLM)
+_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="query-branch")
+_DONE = object()
+# Items a producer may run ahead of its reader before it waits
+STREAM_BUFFER = 256
+
+
+class BranchTimeout(Exception):
+    """A branch did not finish within its own timeout."""
+
+def submit_branch(fn):
+    """Start fn() on the shared pool; collect it with branch_result()."""
+    return _pool.submit(fn)
+
+def branch_result(future, name: str, timeout: float, started: float = None):
+    """
+    Result of a submitted branch, or the exception it raised / BranchTimeout.
+    The timeout counts from `started` (time.monotonic()) when given, else from now.
+    """
+    elapsed = time.monotonic() - started if started is not None else 0.0
+    try:
+        return future.result(timeout=max(timeout - elapsed, 0))
+    except TimeoutError:
+        return BranchTimeout(f"{name} took longer than {timeout:g}s")
+    except Exception as e:
+        return e
+
+def run_branches(branches: dict, timeouts: dict) -> dict:
+    """
+    Start every branch ({name: zero-arg callable}) at once and collect
+    {name: result | exception}. Each branch is bounded by its own timeout,
+    measured from the common start, so the caller waits for the slowest
+    branch that is still within budget - never for the sum of them.
+    """
+    started = time.monotonic()
+    futures = {name: submit_branch(fn) for name, fn in branches.items()}
+    return {name: branch_result(future, name, timeouts[name], started) for name, future in futures.items()}
+
+def _offer(items: queue.Queue, cancelled: threading.Event, entry) -> bool:
+    """Producer side: wait for room in the buffer, unless the reader has gone."""
+    while not cancelled.is_set():
+        try:
+            items.put(entry, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+class BranchStream:
+    """
+    Iterator over a streaming branch. Exhausting it, a timeout, an error or
+    close() (also on garbage collection, e.g. when the client goes away)
+    sets `cancelled`, which the producer checks between items to stop and
+    give its pool thread back.
+    """
+
+    def __init__(self, name: str, timeout: float):
+        self.name = name
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout
+        self.items = queue.Queue(maxsize=STREAM_BUFFER)
+        self.cancelled = threading.Event()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.cancelled.is_set():
+            raise StopIteration
+        try:
+            item, error = self.items.get(timeout=max(self.deadline - time.monotonic(), 0))
+        except queue.Empty:
+            self.close()
+            raise BranchTimeout(f"{self.name} took longer than {self.timeout:g}s")
+        if error is not None:
+            self.close()
+            raise error
+        if item is _DONE:
+            self.close()
+            raise StopIteration
+        return item
+
+    def close(self):
+        self.cancelled.set()
+
+    def __del__(self):
+        self.cancelled.set()
+
+def stream_branch(produce, name: str, timeout: float) -> BranchStream:
+    """
+    Start iterating produce() on the shared pool right away and return a
+    BranchStream over its items as they arrive. Iterating raises the
+    producer's exception, or BranchTimeout once `timeout` seconds have
+    passed since the call; either way the producer is stopped.
+    """
+    stream = BranchStream(name, timeout)
+    # the producer holds only the queue and the flag, so a dropped stream is collected (and cancels)
+    items, cancelled = stream.items, stream.cancelled
+
+    def pump():
+        produced = produce()
+        try:
+            for item in produced:
+                if cancelled.is_set() or not _offer(items, cancelled, (item, None)):
+                    return
+            _offer(items, cancelled, (_DONE, None))
+        except Exception as e:
+            _offer(items, cancelled, (None, e))
+        finally:
+            # closes the LLM generator (and its HTTP stream) when stopped early
+            close = getattr(produced, "close", None)
+            if close:
+                close()
+
+    submit_branch(pump)
+    return stream
@@ -0,0 +1,122 @@
+import os
+import time
+import random
+import threading
+
+import httpx
+
+# Point at a local stub server in tests / staging
+COINGECKO_BASE_URL = os.getenv("COINGECKO_BASE_URL", "https://api.coingecko.com/api/v3")
+# Free tier allows roughly 30 calls per minute; bursts beyond this queue client-side
+COINGECKO_RATE_PER_MIN = float(os.getenv("COINGECKO_RATE_PER_MIN", "30"))
+COINGECKO_BURST = int(os.getenv("COINGECKO_BURST", "5"))
+# Processes drawing on that one budget (api.py sets it to API_WORKERS); each gets an equal slice
+COINGECKO_RATE_SHARE = max(int(os.getenv("COINGECKO_RATE_SHARE", "1")), 1)
+REQUEST_TIMEOUT = 15
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+# Longest we wait for a rate-limit token before giving up on a call
+MAX_QUEUE_WAIT = 60.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class RateLimitTimeout(Exception):
+    """The client-side token bucket did not free a slot within the allowed wait."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, up to `capacity`
+    banked. acquire() blocks until a token is free, so bursts queue up
+    instead of being sent and rejected with 429.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float = MAX_QUEUE_WAIT):
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            if time.monotonic() + wait > deadline:
+                raise RateLimitTimeout(f"no request slot within {timeout:.0f}s")
+            time.sleep(wait)
+
+def backoff_delay(attempt: int, retry_after=None) -> float:
+    """Full-jitter exponential backoff; a server Retry-After (seconds) wins when given."""
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+class HttpClient:
+    """
+    Shared JSON-over-HTTP client: one pooled keep-alive httpx.Client (so
+    DNS + TLS are paid once per connection, not per call), a client-side
+    token bucket, and jittered exponential retries on 429/5xx and
+    connection errors.
+    """
+
+    def __init__(self, base_url: str, rate_per_min: float, burst: int = COINGECKO_BURST,
+                 max_retries: int = MAX_RETRIES, timeout: float = REQUEST_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rate_per_min / 60.0, burst)
+        self.client = httpx.Client(
+            base_url=self.base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            headers={"Accept": "application/json"},
+        )
+        self.requests = self.retries = 0
+
+    def get_json(self, path: str, params: dict = None):
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            self.requests += 1
+            try:
+                response = self.client.get(path, params=params)
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                time.sleep(backoff_delay(attempt))
+                continue
+            if response.status_code in RETRY_STATUS and attempt < self.max_retries:
+                self.retries += 1
+                time.sleep(backoff_delay(attempt, response.headers.get("Retry-After")))
+                continue
+            response.raise_for_status()
+            return response.json()
+
+    def close(self):
+        self.client.close()
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_coingecko_client() -> HttpClient:
+    """Process-wide CoinGecko client (pooled connections + this process's slice of the rate budget)."""
+    with _clients_lock:
+        if "coingecko" not in _clients:
+            _clients["coingecko"] = HttpClient(
+                COINGECKO_BASE_URL,
+                COINGECKO_RATE_PER_MIN / COINGECKO_RATE_SHARE,
+                burst=max(COINGECKO_BURST // COINGECKO_RATE_SHARE, 1),
+            )
+        return _clients["coingecko"]
@@ -0,0 +1,134 @@
+import os
+import time
+import threading
+
+from tools.http_client import get_coingecko_client
+from tools.price_service import price_service, fetch_simple_price
+
+# Off unless enabled: every process running it spends part of the shared CoinGecko rate budget
+MARKET_POLLER = os.getenv("MARKET_POLLER", "0").lower() in ("1", "true", "yes")
+POLL_INTERVAL = float(os.getenv("POLL_INTERVAL", "60"))
+# Comma-separated CoinGecko ids, or "topN" for the N largest coins by market cap
+WATCHLIST = os.getenv("WATCHLIST", "top100")
+WATCHLIST_CURRENCIES = [c.strip().lower() for c in os.getenv("WATCHLIST_CURRENCIES", "usd").split(",") if c.strip()]
+# Ids per /simple/price call; keeps the query string well under URL limits
+POLL_BATCH_SIZE = 100
+# A "topN" watchlist is re-ranked this often
+WATCHLIST_REFRESH = 3600
+
+def top_coins(n: int, currency: str = "usd") -> list:
+    """Ids of the n largest coins by market cap (/coins/markets, 250 per page)."""
+    ids, page = [], 1
+    while len(ids) < n:
+        rows = get_coingecko_client().get_json("/coins/markets", params={
+            "vs_currency": currency, "order": "market_cap_desc", "per_page": min(250, n), "page": page,
+        })
+        if not rows:
+            break
+        ids.extend(row["id"] for row in rows)
+        page += 1
+    return ids[:n]
+
+
+class MarketPoller:
+    """
+    Background snapshot of watchlist prices. A daemon thread refreshes every
+    coin x currency with a few batched /simple/price calls per interval;
+    lookups read the in-memory snapshot and never touch the network.
+    """
+
+    def __init__(self, watchlist=WATCHLIST, currencies=None, interval=POLL_INTERVAL, fetch=fetch_simple_price):
+        self.watchlist_spec = watchlist
+        self.currencies = currencies or WATCHLIST_CURRENCIES
+        self.interval = interval
+        self.fetch = fetch
+        self.snapshot = {}          # (coin, currency) -> quote, same shape as PriceService quotes
+        self.coins = []
+        self.last_poll = 0.0
+        self.errors = 0
+        self._watchlist_at = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    # === WATCHLIST ===
+    def _resolve_watchlist(self):
+        spec = self.watchlist_spec
+        if isinstance(spec, (list, tuple)):
+            return [c.lower() for c in spec]
+        spec = spec.strip().lower()
+        if spec.startswith("top") and spec[3:].isdigit():
+            return top_coins(int(spec[3:]))
+        return [c.strip() for c in spec.split(",") if c.strip()]
+
+    def refresh_watchlist(self, force=False):
+        if force or not self.coins or time.time() - self._watchlist_at > WATCHLIST_REFRESH:
+            try:
+                self.coins = self._resolve_watchlist()
+                self._watchlist_at = time.time()
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠ Watchlist refresh failed, keeping {len(self.coins)} coins: {e}")
+
+    # === POLLING ===
+    def poll_once(self):
+        """Refresh the whole watchlist; a failed batch keeps its previous quotes."""
+        self.refresh_watchlist()
+        for start in range(0, len(self.coins), POLL_BATCH_SIZE):
+            batch = self.coins[start:start + POLL_BATCH_SIZE]
+            try:
+                data = self.fetch(batch, self.currencies)
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠ Price poll failed for {len(batch)} coins: {e}")
+                continue
+            now = time.time()
+            for coin in batch:
+                info = data.get(coin) or {}
+                for currency in self.currencies:
+                    price = info.get(currency)
+                    if price:
+                        self.snapshot[(coin, currency)] = {
+                            "coin": coin,
+                            "currency": currency,
+                            "price": price,
+                            "change_24h": info.get(f"{currency}_24h_change") or 0.0,
+                            "fetched_at": now,
+                            "stale": False,
+                        }
+        self.last_poll = time.time()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.poll_once()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="market-poller", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def get(self, coin_id: str, currency: str = "usd", max_age: float = None):
+        """Snapshot quote if present and younger than max_age (default: two poll intervals)."""
+        quote = self.snapshot.get((coin_id.lower(), currency.lower()))
+        max_age = 2 * self.interval if max_age is None else max_age
+        if quote and time.time() - quote["fetched_at"] <= max_age:
+            return quote
+        return None
+
+_poller = None
+
+def start_market_poller(**kwargs) -> MarketPoller:
+    """Start the process-wide poller and let the shared price service answer from it first."""
+    global _poller
+    if _poller is None:
+        _poller = MarketPoller(**kwargs)
+        price_service.snapshot = _poller
+    return _poller.start()
+
+def start_market_poller_if_enabled():
+    return start_market_poller() if MARKET_POLLER else None
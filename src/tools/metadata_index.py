@@ -0,0 +1,199 @@
+import re
+import pathlib
+from datetime import datetime, timezone
+
+import numpy as np
+
+META_INDEX_FILE = "meta_index.npz"
+# Fields with prebuilt postings; anything else is indexed lazily on first use
+INDEXED_FIELDS = ("source", "subreddit", "coins")
+# Stored as comma-separated strings because Chroma metadata cannot hold lists
+MULTI_VALUED = {"coins"}
+# Public filter names -> metadata fields
+FILTER_ALIASES = {"coin": "coins"}
+DATE_FIELDS = ("date", "ingest_date")
+KNOWN_SOURCES = ("reddit", "youtube", "rektcapital", "cryptoquant", "unchainedcrypto", "substack")
+
+def parse_date(value):
+    """
+    ISO date/datetime string, datetime, or epoch seconds (int/float or numeric
+    string, as Reddit's created_utc is stored) -> UTC timestamp; None if unparseable.
+    """
+    if value is None or value == "" or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        text = str(value).strip()
+        try:
+            dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        except ValueError:
+            try:
+                return float(text)
+            except ValueError:
+                return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+def field_values(meta: dict, field: str):
+    value = meta.get(field)
+    if value is None or value == "":
+        return []
+    if field in MULTI_VALUED:
+        return [v for v in str(value).split(",") if v]
+    return [value]
+
+def _as_list(wanted):
+    return list(wanted) if isinstance(wanted, (list, tuple, set)) else [wanted]
+
+def split_filters(filters: dict):
+    """{'coin': 'solana', 'date_from': ...} -> ({'coins': ['solana']}, date_from, date_to)"""
+    fields, date_from, date_to = {}, None, None
+    for name, wanted in (filters or {}).items():
+        if wanted is None or wanted == []:
+            continue
+        if name == "date_from":
+            date_from = parse_date(wanted)
+        elif name == "date_to":
+            date_to = parse_date(wanted)
+        else:
+            fields[FILTER_ALIASES.get(name, name)] = _as_list(wanted)
+    return fields, date_from, date_to
+
+
+class MetadataIndex:
+    """
+    Pre-filter index over chunk metadata: a sorted array of row ids per
+    (field, value) plus row ids sorted by date. Structured filters become a
+    few array intersections, so similarity scoring only touches candidates.
+    """
+
+    def __init__(self, postings, date_rows, date_ts, metadatas=None):
+        self.postings = postings          # {field: {value: sorted int32 rows}}
+        self.date_rows = date_rows        # rows ordered by timestamp
+        self.date_ts = date_ts            # matching sorted timestamps
+        self.metadatas = metadatas
+
+    @classmethod
+    def build(cls, metadatas, fields=INDEXED_FIELDS):
+        metadatas = list(metadatas)
+        postings = {field: cls._postings_for(metadatas, field) for field in fields}
+        dated = []
+        for row, meta in enumerate(metadatas):
+            ts = next((t for t in (parse_date(meta.get(f)) for f in DATE_FIELDS) if t is not None), None)
+            if ts is not None:
+                dated.append((ts, row))
+        dated.sort()
+        date_ts = np.asarray([ts for ts, _ in dated], dtype=np.float64)
+        date_rows = np.asarray([row for _, row in dated], dtype=np.int32)
+        return cls(postings, date_rows, date_ts, metadatas)
+
+    @staticmethod
+    def _postings_for(metadatas, field):
+        rows = {}
+        for row, meta in enumerate(metadatas):
+            for value in field_values(meta, field):
+                rows.setdefault(str(value).lower(), []).append(row)
+        return {value: np.asarray(r, dtype=np.int32) for value, r in rows.items()}
+
+    # === PERSISTENCE ===
+    def save(self, path):
+        keys, offsets, rows = [], [0], []
+        for field, values in self.postings.items():
+            for value, value_rows in values.items():
+                keys.append(f"{field}\t{value}")
+                rows.append(value_rows)
+                offsets.append(offsets[-1] + len(value_rows))
+        np.savez(pathlib.Path(path) / META_INDEX_FILE,
+                 keys=np.asarray(keys, dtype=str), offsets=np.asarray(offsets, dtype=np.int64),
+                 rows=np.concatenate(rows) if rows else np.empty(0, dtype=np.int32),
+                 date_rows=self.date_rows, date_ts=self.date_ts)
+
+    @classmethod
+    def load(cls, path, metadatas=None):
+        """Load a prebuilt index from `path`, or build one from `metadatas` if none was saved."""
+        file = pathlib.Path(path) / META_INDEX_FILE
+        if not file.exists():
+            return cls.build(metadatas or [])
+        arrays = np.load(file)
+        postings = {}
+        offsets, rows = arrays["offsets"], arrays["rows"]
+        for i, key in enumerate(arrays["keys"]):
+            field, value = str(key).split("\t", 1)
+            postings.setdefault(field, {})[value] = rows[offsets[i]:offsets[i + 1]]
+        return cls(postings, arrays["date_rows"], arrays["date_ts"], metadatas)
+
+    # === LOOKUPS ===
+    def rows(self, field, values) -> np.ndarray:
+        if field not in self.postings:
+            if self.metadatas is None:
+                raise ValueError(f"❌ Metadata field '{field}' is not indexed")
+            self.postings[field] = self._postings_for(self.metadatas, field)
+        found = [self.postings[field].get(str(v).lower()) for v in values]
+        found = [r for r in found if r is not None]
+        if not found:
+            return np.empty(0, dtype=np.int32)
+        return found[0] if len(found) == 1 else np.unique(np.concatenate(found))
+
+    def date_range(self, date_from=None, date_to=None) -> np.ndarray:
+        lo = 0 if date_from is None else np.searchsorted(self.date_ts, date_from, side="left")
+        hi = len(self.date_ts) if date_to is None else np.searchsorted(self.date_ts, date_to, side="right")
+        return np.sort(self.date_rows[lo:hi])
+
+    def candidates(self, filters):
+        """
+        Sorted row ids matching all filters, or None when nothing is filtered.
+        filters: {"source": "reddit" | [...], "subreddit": ..., "coin": ...,
+                  "date_from": "2025-01-01", "date_to": ...}
+        """
+        fields, date_from, date_to = split_filters(filters)
+        rows = None
+        for field, values in fields.items():
+            matched = self.rows(field, values)
+            rows = matched if rows is None else np.intersect1d(rows, matched, assume_unique=True)
+        if date_from is not None or date_to is not None:
+            matched = self.date_range(date_from, date_to)
+            rows = matched if rows is None else np.intersect1d(rows, matched, assume_unique=True)
+        return rows
+
+# === HELPERS FOR STORES WITHOUT THE INDEX (Chroma) ===
+def to_chroma_where(filters):
+    """
+    The part of `filters` Chroma can evaluate natively. Only `source` qualifies:
+    its values are always lowercase, while Chroma matching is case-sensitive.
+    """
+    fields, _, _ = split_filters(filters)
+    if "source" not in fields:
+        return None
+    return {"source": {"$in": [str(v).lower() for v in fields["source"]]}}
+
+def matches(meta: dict, filters) -> bool:
+    """Python-side check of every filter against one chunk's metadata."""
+    fields, date_from, date_to = split_filters(filters)
+    for field, values in fields.items():
+        have = {str(v).lower() for v in field_values(meta, field)}
+        if not have & {str(v).lower() for v in values}:
+            return False
+    if date_from is not None or date_to is not None:
+        ts = next((t for t in (parse_date(meta.get(f)) for f in DATE_FIELDS) if t is not None), None)
+        if ts is None or (date_from is not None and ts < date_from) or (date_to is not None and ts > date_to):
+            return False
+    return True
+
+def infer_filters(query: str) -> dict:
+    """Structured filters spelled out in a question: 'reddit', 'r/ethfinance', 'youtube', newsletter names."""
+    q = query.lower()
+    filters = {}
+    subreddits = re.findall(r"\br/([a-z0-9_]+)", q)
+    if subreddits:
+        filters["subreddit"] = subreddits
+        filters["source"] = "reddit"
+    sources = [s for s in KNOWN_SOURCES if re.search(rf"\b{s}\b", q)]
+    if re.search(r"\b(videos?|youtubers?)\b", q):
+        sources.append("youtube")
+    if sources and "source" not in filters:
+        filters["source"] = sources
+    return filters
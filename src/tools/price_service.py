@@ -0,0 +1,185 @@
+import os
+import time
+import threading
+from concurrent.futures import Future
+
+from tools.http_client import get_coingecko_client
+
+# Quotes younger than this are served from memory
+PRICE_TTL = float(os.getenv("PRICE_TTL", "30"))
+# When CoinGecko errors, a cached quote up to this old is served (marked stale) instead of an error
+PRICE_STALE_TTL = float(os.getenv("PRICE_STALE_TTL", "600"))
+
+
+class PriceUnavailable(Exception):
+    """No quote could be fetched and no usable cached one exists."""
+
+def fetch_simple_price(ids, currencies) -> dict:
+    """Raw /simple/price response for the given coin ids and quote currencies."""
+    params = {
+        "ids": ",".join(ids),
+        "vs_currencies": ",".join(currencies),
+        "include_24hr_change": "true",
+    }
+    # pooled keep-alive connection, rate-limited and retried on 429/5xx
+    return get_coingecko_client().get_json("/simple/price", params=params)
+
+
+class PriceService:
+    """
+    Shared quote cache in front of /simple/price:
+      - quotes are cached per (coin, currency) for `ttl` seconds
+      - concurrent lookups of the same key share one in-flight request (singleflight)
+      - if the upstream call fails, a quote up to `stale_ttl` old is returned with stale=True
+      - with a market poller attached (tools/market_poller.py), watchlist coins are
+        answered from its snapshot and never reach the network
+    """
+
+    def __init__(self, fetch=fetch_simple_price, ttl=PRICE_TTL, stale_ttl=PRICE_STALE_TTL):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._quotes = {}      # (coin, currency) -> quote dict
+        self._inflight = {}    # (coin, currency) -> Future of the leader's fetch
+        self._lock = threading.Lock()
+        self.snapshot = None   # MarketPoller, set by start_market_poller()
+        self.hits = self.misses = self.coalesced = self.stale_served = self.snapshot_hits = 0
+
+    def get_quote(self, coin_id: str, currency: str = "usd") -> dict:
+        """
+        {"coin", "currency", "price", "change_24h", "fetched_at", "stale"}
+        Raises PriceUnavailable when neither CoinGecko nor the cache can answer.
+        """
+        result = self.get_quotes([coin_id], [currency])[(coin_id.lower(), currency.lower())]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def get_quotes(self, coin_ids, currencies=("usd",)) -> dict:
+        """
+        Quotes for every (coin, currency) pair, fetched with at most one
+        /simple/price call (comma-separated ids and vs_currencies) for the
+        pairs that are neither cached nor already being fetched by another
+        caller. Returns {(coin, currency): quote | PriceUnavailable}.
+        """
+        keys = [(c.lower(), cur.lower()) for c in dict.fromkeys(coin_ids) for cur in dict.fromkeys(currencies)]
+        results, waiting, leading = {}, {}, {}
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                polled = self.snapshot.get(*key) if self.snapshot is not None else None
+                if polled:
+                    self.snapshot_hits += 1
+                    results[key] = polled
+                    continue
+                quote = self._quotes.get(key)
+                if quote and now - quote["fetched_at"] <= self.ttl:
+                    self.hits += 1
+                    results[key] = quote
+                elif key in self._inflight:
+                    self.coalesced += 1
+                    waiting[key] = self._inflight[key]
+                else:
+                    self.misses += 1
+                    leading[key] = self._inflight[key] = Future()
+        if leading:
+            try:
+                loaded = self._load(list(leading))
+            except Exception as e:
+                loaded = {key: PriceUnavailable(str(e)) for key in leading}
+            for key, future in leading.items():
+                results[key] = loaded[key]
+                future.set_result(loaded[key])
+            with self._lock:
+                for key in leading:
+                    self._inflight.pop(key, None)
+        for key, future in waiting.items():
+            results[key] = future.result()
+        return {key: results[key] for key in keys}
+
+    def _load(self, keys) -> dict:
+        """One batched fetch for `keys`; {key: quote | PriceUnavailable}."""
+        coins = list(dict.fromkeys(coin for coin, _ in keys))
+        currencies = list(dict.fromkeys(cur for _, cur in keys))
+        try:
+            data = self.fetch(coins, currencies)
+        except Exception as e:
+            return {key: self._stale_or_error(key, e) for key in keys}
+        now = time.time()
+        results, fresh = {}, {}
+        for key in keys:
+            coin, currency = key
+            info = data.get(coin) or {}
+            price = info.get(currency)
+            if not price:
+                results[key] = PriceUnavailable(f"no {currency.upper()} price for '{coin}'")
+                continue
+            results[key] = fresh[key] = {
+                "coin": coin,
+                "currency": currency,
+                "price": price,
+                "change_24h": info.get(f"{currency}_24h_change") or 0.0,
+                "fetched_at": now,
+                "stale": False,
+            }
+        with self._lock:
+            self._quotes.update(fresh)
+        return results
+
+    def _stale_or_error(self, key, error):
+        cached = self._quotes.get(key)
+        if cached and time.time() - cached["fetched_at"] <= self.stale_ttl:
+            self.stale_served += 1
+            return {**cached, "stale": True}
+        return PriceUnavailable(f"CoinGecko request error: {error}")
+
+    def stats(self) -> dict:
+        return {"snapshot_hits": self.snapshot_hits, "hits": self.hits, "misses": self.misses,
+                "coalesced": self.coalesced, "stale_served": self.stale_served, "cached": len(self._quotes)}
+
+price_service = PriceService()
+
+def format_quote(quote: dict) -> str:
+    """'$64,210.55 (24h change: 1.23%)', plus the quote's age when it is a stale fallback."""
+    currency = quote["currency"]
+    amount = f"${quote['price']:,.2f}" if currency == "usd" else f"{quote['price']:,.2f} {currency.upper()}"
+    text = f"{amount} (24h change: {quote['change_24h']:.2f}%)"
+    if quote.get("stale"):
+        text += f" ⚠ as of {int(time.time() - quote['fetched_at'])}s ago, CoinGecko is not responding"
+    return text
+
+def price_summary(coin_id: str, currency: str = "usd") -> str:
+    """One-line price answer for the UIs, or an error line."""
+    try:
+        return format_quote(price_service.get_quote(coin_id, currency))
+    except PriceUnavailable:
+        return f"❌ Could not fetch price for '{coin_id}'."
+
+def price_table(coin_ids, currencies=("usd",)) -> list:
+    """
+    Structured quotes for comparison questions, one batched request:
+    [{"coin", "currency", "price", "change_24h", "stale", "error"}], in the
+    order coins and currencies were asked for. Failed pairs carry "error".
+    """
+    quotes = price_service.get_quotes(coin_ids, currencies)
+    rows = []
+    for key, result in quotes.items():
+        coin, currency = key
+        if isinstance(result, Exception):
+            rows.append({"coin": coin, "currency": currency, "price": None, "change_24h": None,
+                         "stale": False, "error": str(result)})
+        else:
+            rows.append({"coin": coin, "currency": currency, "price": result["price"],
+                         "change_24h": result["change_24h"], "stale": result["stale"], "error": None})
+    return rows
+
+def format_price_table(rows) -> str:
+    """Markdown table of price_table() rows."""
+    lines = ["| Coin | Currency | Price | 24h change |", "|---|---|---:|---:|"]
+    for row in rows:
+        if row["error"]:
+            lines.append(f"| {row['coin']} | {row['currency'].upper()} | n/a | n/a |")
+            continue
+        stale = " ⚠ stale" if row["stale"] else ""
+        lines.append(f"| {row['coin']} | {row['currency'].upper()} | {row['price']:,.2f}{stale} | {row['change_24h']:.2f}% |")
+    return "\n".join(lines)
@@ -0,0 +1,109 @@
+import threading
+from typing import Dict, List, NamedTuple
+
+from tools.coin_matcher import KeywordTrie, FIAT_CURRENCIES, MATCH_ANY, coin_patterns, accept_mention, _words
+
+PRICE_KEYWORDS = (
+    "price", "prices", "priced", "current", "currently", "worth", "value", "valued", "update", "updates",
+    "today", "latest", "cost", "costs", "trading at", "how much", "quote", "compare",
+)
+ANALYSIS_KEYWORDS = (
+    "say", "says", "said", "saying", "opinion", "opinions", "think", "thinks", "analysis", "analyst",
+    "view", "views", "news", "report", "reports", "insight", "insights", "outlook", "sentiment",
+)
+# Popular coins people type in lowercase ("price of sol"); matched case-insensitively, whole words only.
+# "link" and "dot" are left to coin_matcher, which takes them only as "LINK"/"DOT" or "$link"/"$dot"
+COIN_ALIASES = {
+    "bitcoin": "bitcoin", "btc": "bitcoin",
+    "ethereum": "ethereum", "eth": "ethereum",
+    "solana": "solana", "sol": "solana",
+    "cardano": "cardano", "ada": "cardano",
+    "dogecoin": "dogecoin", "doge": "dogecoin",
+    "xrp": "ripple", "ripple": "ripple",
+    "polkadot": "polkadot",
+    "litecoin": "litecoin", "ltc": "litecoin",
+    "avalanche": "avalanche-2", "avax": "avalanche-2",
+    "chainlink": "chainlink",
+    "matic": "matic-network", "polygon": "matic-network",
+    "tron": "tron", "trx": "tron",
+    "stellar": "stellar", "xlm": "stellar",
+    "monero": "monero", "xmr": "monero",
+    "shiba inu": "shiba-inu", "shib": "shiba-inu",
+}
+# Quote currencies recognised in questions ("in EUR", "btc vs gbp") are FIAT_CURRENCIES; crypto
+# quotes are left out because "BTC"/"ETH" in a question almost always name the coin, not the currency
+CURRENCY_SIGNS = {"€": "eur", "£": "gbp", "¥": "jpy"}
+
+
+class Route(NamedTuple):
+    intent: str              # "price" | "analysis" | "hybrid"
+    coins: List[str]         # CoinGecko ids, in order of first mention
+    currencies: List[str]    # quote currencies asked for, ["usd"] by default
+
+
+class QueryRouter:
+    """
+    Classifies a question and extracts its coins and currencies in one pass.
+    Every COIN_MAP name/symbol/id, the coin aliases, intent keywords and
+    currency codes live in a single word trie, so a query costs one linear
+    scan over its words however many of the 15k+ coins are loaded, and
+    matches respect word boundaries ("sol" never fires inside "solution").
+    """
+
+    def __init__(self, coin_map: Dict[str, str], overrides: Dict[str, str] = None):
+        self.trie = KeywordTrie()
+        # later additions win on identical keys: COIN_MAP < aliases < currencies < intent words
+        for words, coin_id, mode in coin_patterns(coin_map, overrides):
+            self.trie.add(words, ("coin", coin_id, mode))
+        for alias, coin_id in COIN_ALIASES.items():
+            self.trie.add(alias.split(), ("coin", coin_id, MATCH_ANY))
+        for code in FIAT_CURRENCIES:
+            self.trie.add([code], ("currency", code, MATCH_ANY))
+        for kind, keywords in (("price", PRICE_KEYWORDS), ("analysis", ANALYSIS_KEYWORDS)):
+            for keyword in keywords:
+                self.trie.add(keyword.split(), ("intent", kind, MATCH_ANY))
+
+    def route(self, query: str) -> Route:
+        spans = _words(query or "")
+        words = [w.lstrip("$").lower() for _, _, w in spans]
+        coins, currencies, intents = {}, {}, set()
+        for i, n, (kind, value, mode) in self.trie.scan(words):
+            if kind == "coin" and accept_mention(spans[i][2], mode):
+                coins.setdefault(value, None)
+            elif kind == "currency":
+                currencies.setdefault(value, None)
+            elif kind == "intent":
+                intents.add(value)
+        for sign, code in CURRENCY_SIGNS.items():
+            if sign in (query or ""):
+                currencies.setdefault(code, None)
+
+        price_asked, analysis_asked = "price" in intents, "analysis" in intents
+        if price_asked and analysis_asked:
+            intent = "hybrid"
+        elif price_asked:
+            intent = "price"
+        elif coins and not analysis_asked:
+            # a bare coin mention ("thoughts on solana?") gets both price and analysis
+            intent = "hybrid"
+        else:
+            intent = "analysis"
+        return Route(intent, list(coins), list(currencies) or ["usd"])
+
+_router = None
+_router_version = None
+_router_lock = threading.Lock()
+
+def get_query_router() -> QueryRouter:
+    """Process-wide router over COIN_MAP; rebuilt after a coin-list refresh."""
+    global _router, _router_version
+    from tools.coingecko_tool import COIN_MAP, _OVERRIDES
+    with _router_lock:
+        COIN_MAP.get("")  # loads the map (or kicks off a refresh) before the version check
+        if _router is None or _router_version != COIN_MAP.version:
+            _router = QueryRouter(COIN_MAP, _OVERRIDES)
+            _router_version = COIN_MAP.version
+        return _router
+
+def route_query(query: str) -> Route:
+    return get_query_router().route(query)
@@ -1,42 +1,45 @@
+import sys, os
+# Make "src" importable when running this file directly
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 from dotenv import load_dotenv
 load_dotenv()
 
-import os
-import pathlib
+from typing import List
 from langchain.tools import Tool
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import OpenAIEmbeddings
 
-# Resolve an absolute Chroma dir at the REPO ROOT
-# This avoids "relative path" issues when you run from different folders.
-# File path here is .../src/tools/rag_tool.py
-REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
-CHROMA_DIR = str(REPO_ROOT / "chroma_store")  # change if your DB lives elsewhere
+from tools.embedding_cache import get_embeddings
+from tools.vector_store import get_vectorstore
+from tools.bm25_index import load_bm25_index
+from tools.retrieval import HybridRetriever
+from tools.metadata_index import infer_filters
+from tools.coin_matcher import load_coin_index
+from tools.query_router import route_query
+from tools.context_packer import pack_context, CONTEXT_TOKEN_BUDGET
 
 # Build embeddings + vectordb once (module-level cache)
-embedding = OpenAIEmbeddings()
-vectordb = Chroma(persist_directory=CHROMA_DIR, embedding_function=embedding)
+# VECTOR_BACKEND picks Chroma or the NumPy index; both resolve their dirs at the REPO ROOT.
+embedding = get_embeddings()
+vectordb = get_vectorstore(embedding)
+# Dense + BM25 fusion; falls back to BM25 alone when the embedding API is slow or down
+# Coin-scoped questions rank only the chunks tagged with that coin at ingest
+retriever = HybridRetriever(vectordb, load_bm25_index(), coin_index=load_coin_index())
 
-def retrieve_crypto_context(query: str, k: int = 4) -> str:
+def format_context(docs, budget_tokens: int = CONTEXT_TOKEN_BUDGET) -> str:
     """
-    Searches your local Chroma knowledge base for relevant chunks and
-    returns a compact, readable context block the agent can use directly.
+    Render retrieved chunks as the numbered context block the agent reads.
+    Chunks are packed first: one block per URL/video, overlaps removed,
+    at most `budget_tokens` of text in score order.
     """
-    try:
-        docs = vectordb.similarity_search(query, k=k)
-    except Exception as e:
-        return f"❌ Retrieval error: {e}"
-
     if not docs:
         return "No relevant information found in the knowledge base."
 
     lines = []
-    for i, doc in enumerate(docs, 1):
+    for i, doc in enumerate(pack_context(docs, budget_tokens), 1):
         meta = doc.metadata or {}
         source = meta.get("source", "unknown")
         title = meta.get("title", "Untitled")
         url = meta.get("url", "")
-        preview = (doc.page_content or "").strip()[:1000]
+        text = (doc.page_content or "").strip()
 
         lines.append(f"--- Source {i} ---")
         lines.append(f"Source: {source.upper()}")
@@ -48,11 +51,44 @@ def retrieve_crypto_context(query: str, k: int = 4) -> str:
         if url:
             lines.append(f"URL: {url}")
         lines.append("")
-        lines.append(preview)
+        lines.append(text)
         lines.append("")
 
     return "\n".join(lines).strip()
 
+def retrieve_crypto_context(query: str, k: int = 4, mode: str = None, filters: dict = None) -> str:
+    """
+    Searches your local knowledge base (vectors + BM25) for relevant chunks and
+    returns a compact, readable context block the agent can use directly.
+    mode: "hybrid" | "vector" | "bm25" (defaults to RETRIEVAL_MODE).
+    filters: {"source", "subreddit", "coin", "date_from", "date_to"}; when omitted,
+    sources ("on Reddit", "r/ethfinance") and coins named in the question are used.
+    """
+    inferred = filters is None
+    if inferred:
+        filters = infer_filters(query)
+        coins = route_query(query).coins
+        if coins:
+            filters["coin"] = coins
+    try:
+        docs = retriever.search(query, k=k, mode=mode, filters=filters)
+        if not docs and inferred and filters:
+            # A guessed filter should narrow the search, never empty it
+            docs = retriever.search(query, k=k, mode=mode)
+    except Exception as e:
+        return f"❌ Retrieval error: {e}"
+
+    return format_context(docs)
+
+def retrieve_many(queries: List[str], k: int = 4, filters: dict = None, mode: str = None) -> List[str]:
+    """
+    Batch retrieval for offline jobs (nightly digests, retrieval evals, answer
+    cache warming): the queries are embedded in one request and scored against
+    the index together. Returns one context block per query, in order.
+    `filters` applies to every query; nothing is inferred per question here.
+    """
+    return [format_context(docs) for docs in retriever.search_many(queries, k=k, mode=mode, filters=filters)]
+
 rag_tool = Tool(
     name="CryptoTranscriptRetriever",
     func=retrieve_crypto_context,
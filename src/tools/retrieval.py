@@ -0,0 +1,182 @@
+import os
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import numpy as np
+
+try:
+    from langchain_core.documents import Document
+except Exception:
+    from langchain.schema import Document
+
+from tools.metadata_index import to_chroma_where, matches, split_filters
+
+# "hybrid" (vector + BM25 fused), "vector" or "bm25" (local only, no embedding call)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid").lower()
+# Past this the embedding API counts as down and hybrid answers from BM25 alone
+VECTOR_TIMEOUT = float(os.getenv("VECTOR_TIMEOUT", "3"))
+RRF_K = 60
+# Each ranker contributes this many times k candidates to the fusion
+CANDIDATE_FACTOR = 3
+# Stores without a metadata index over-fetch this much, then post-filter in Python
+POST_FILTER_FACTOR = 5
+# Coin-scoped Chroma queries score the coin's chunks directly when there are at most this many.
+# Each one pulls its embeddings out of Chroma per query (~6 KB apiece at 1536 dims), so past a
+# few hundred the filtered corpus-wide query is cheaper
+COIN_SCAN_LIMIT = int(os.getenv("COIN_SCAN_LIMIT", "300"))
+
+_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="vector-search")
+
+def doc_key(doc) -> str:
+    """
+    Identity of a chunk across backends. Chroma does not hand back ids through
+    langchain, so the text itself is the key (ingest dedups identical chunks).
+    """
+    return hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+
+def reciprocal_rank_fusion(rankings, k: int, rrf_k: int = RRF_K):
+    """Merge ranked Document lists: score(d) = sum 1 / (rrf_k + rank)."""
+    scores, docs = {}, {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, 1):
+            key = doc_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    best = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [docs[key] for key in best]
+
+
+class HybridRetriever:
+    """
+    Dense (vector store) + lexical (BM25) retrieval fused with RRF.
+    Exact-token questions ("EIP-4844", tickers, names) are caught by BM25;
+    if the vector side errors or exceeds VECTOR_TIMEOUT, BM25 answers alone.
+    """
+
+    def __init__(self, vectordb, bm25=None, mode=RETRIEVAL_MODE, vector_timeout=VECTOR_TIMEOUT, coin_index=None):
+        self.vectordb = vectordb
+        self.bm25 = bm25
+        self.coin_index = coin_index
+        self.mode = mode
+        self.vector_timeout = vector_timeout
+
+    def dense_search(self, query: str, k: int, filters=None) -> List:
+        """
+        Vector search under structured filters. The NumPy index pre-filters with
+        its MetadataIndex; Chroma gets the `where` it can express, then the rest
+        is checked on an over-fetched candidate list.
+        """
+        if not filters:
+            return self.vectordb.similarity_search(query, k=k)
+        if hasattr(self.vectordb, "candidate_rows"):
+            return self.vectordb.similarity_search(query, k=k, filter=filters)
+        ids = self._coin_scope(filters)
+        if ids is not None:
+            return self.coin_scoped_search([self.vectordb.embeddings.embed_query(query)], k, ids, filters)[0]
+        docs = self.vectordb.similarity_search(query, k=k * POST_FILTER_FACTOR, filter=to_chroma_where(filters))
+        return [doc for doc in docs if matches(doc.metadata or {}, filters)][:k]
+
+    def _coin_scope(self, filters):
+        """Chunk ids for a coin filter when the postings make a direct scan cheap, else None."""
+        fields, _, _ = split_filters(filters)
+        if self.coin_index is None or "coins" not in fields:
+            return None
+        ids = self.coin_index.chunk_ids(fields["coins"])
+        return ids if len(ids) <= COIN_SCAN_LIMIT else None
+
+    def dense_search_by_vectors(self, vectors, k: int, filters=None) -> List[List]:
+        """
+        One ranked Document list per query vector, every query scored in one
+        pass: a single matmul on the NumPy index or the coin-scoped chunks, a
+        single multi-embedding query on Chroma.
+        """
+        if hasattr(self.vectordb, "candidate_rows"):
+            return self.vectordb.similarity_search_many_by_vector(vectors, k, filter=filters)
+        ids = self._coin_scope(filters)
+        if ids is not None:
+            return self.coin_scoped_search(vectors, k, ids, filters)
+        fetch = k * POST_FILTER_FACTOR if filters else k
+        got = self.vectordb._collection.query(query_embeddings=[list(map(float, v)) for v in vectors], n_results=fetch,
+                                              where=to_chroma_where(filters), include=["documents", "metadatas"])
+        results = []
+        for texts, metas in zip(got["documents"], got["metadatas"]):
+            docs = [Document(page_content=t, metadata=m or {}) for t, m in zip(texts, metas)]
+            results.append([doc for doc in docs if matches(doc.metadata, filters)][:k])
+        return results
+
+    def coin_scoped_search(self, vectors, k: int, ids: List[str], filters) -> List[List]:
+        """
+        Chroma path for coin filters: fetch the coin's chunks by id from the
+        coin -> chunk postings and rank just those, instead of a corpus-wide query.
+        """
+        if not ids:
+            return [[] for _ in vectors]
+        got = self.vectordb._collection.get(ids=ids, include=["embeddings", "documents", "metadatas"])
+        # The postings are authoritative for coins; chunks embedded before tagging lack the field
+        rest = {name: value for name, value in filters.items() if name not in ("coin", "coins")}
+        keep = [i for i, meta in enumerate(got["metadatas"]) if matches(meta or {}, rest)]
+        if not keep:
+            return [[] for _ in vectors]
+        matrix = np.asarray([got["embeddings"][i] for i in keep], dtype=np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+        queries = np.asarray(vectors, dtype=np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True) + 1e-12
+        scores = matrix @ queries.T
+        results = []
+        for column in scores.T:
+            top = np.argsort(-column)[:k]
+            results.append([Document(page_content=got["documents"][keep[i]], metadata=got["metadatas"][keep[i]] or {})
+                            for i in top])
+        return results
+
+    def search(self, query: str, k: int = 4, mode=None, filters=None) -> List:
+        """
+        filters: optional {"source", "subreddit", "coin", "date_from", "date_to"}
+        applied before ranking (see tools/metadata_index.py).
+        """
+        mode = mode or self.mode
+        if self.bm25 is None:
+            mode = "vector"
+        if mode == "bm25":
+            return self.bm25.search(query, k, filter=filters)
+        if mode == "vector":
+            return self.dense_search(query, k, filters)
+
+        fetch = k * CANDIDATE_FACTOR
+        dense_future = _pool.submit(self.dense_search, query, fetch, filters)
+        lexical = self.bm25.search(query, fetch, filter=filters)
+        try:
+            dense = dense_future.result(timeout=self.vector_timeout)
+        except Exception as e:
+            print(f"⚠ Vector search unavailable ({type(e).__name__}); answering from BM25 only")
+            return lexical[:k]
+        return reciprocal_rank_fusion([dense, lexical], k)
+
+    def search_many(self, queries: List[str], k: int = 4, mode=None, filters=None) -> List[List]:
+        """
+        Batch form of search() for offline jobs (digests, evals, cache warming):
+        one embedding request for all queries, one scoring pass over the index,
+        then per-query BM25 and fusion. Results are in query order.
+        """
+        queries = list(queries)
+        if not queries:
+            return []
+        mode = mode or self.mode
+        if self.bm25 is None:
+            mode = "vector"
+        fetch = k if mode == "vector" else k * CANDIDATE_FACTOR
+        lexical = [] if mode == "vector" else [self.bm25.search(q, fetch, filter=filters) for q in queries]
+        if mode == "bm25":
+            return lexical
+        try:
+            vectors = self.vectordb.embeddings.embed_documents(queries)
+            dense = self.dense_search_by_vectors(vectors, fetch, filters)
+        except Exception as e:
+            if mode == "vector":
+                raise
+            print(f"⚠ Vector search unavailable ({type(e).__name__}); answering from BM25 only")
+            return [docs[:k] for docs in lexical]
+        if mode == "vector":
+            return dense
+        return [reciprocal_rank_fusion([d, l], k) for d, l in zip(dense, lexical)]
@@ -1,20 +1,32 @@
+import sys, os
+# Make "src" importable when running this file directly
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 from dotenv import load_dotenv
 load_dotenv()
-from langchain.vectorstores import Chroma
-from langchain.embeddings import OpenAIEmbeddings
 from langchain.schema import Document
 from typing import List
 
+from tools.embedding_cache import get_embeddings
+from tools.vector_store import get_vectorstore
+from tools.bm25_index import load_bm25_index
+from tools.retrieval import HybridRetriever
+from tools.coin_matcher import load_coin_index
+
 CHROMA_DIR = "chroma_store"
 
 # Initialize once
-embedding = OpenAIEmbeddings()
-vectordb = Chroma(persist_directory=CHROMA_DIR, embedding_function=embedding)
+embedding = get_embeddings()
+vectordb = get_vectorstore(embedding, chroma_dir=CHROMA_DIR)
+retriever = HybridRetriever(vectordb, load_bm25_index(), coin_index=load_coin_index())
 
-def retrieve_crypto_context(query: str, k: int = 4) -> List[Document]:
-    results = vectordb.similarity_search(query, k=k)
+def retrieve_crypto_context(query: str, k: int = 4, mode: str = None, filters: dict = None) -> List[Document]:
+    results = retriever.search(query, k=k, mode=mode, filters=filters)
     return results
 
+def retrieve_many(queries: List[str], k: int = 4, filters: dict = None, mode: str = None) -> List[List[Document]]:
+    """One embedding batch and one scoring pass for all queries; results in query order."""
+    return retriever.search_many(queries, k=k, mode=mode, filters=filters)
+
 if __name__ == "__main__":
     # Test the tool directly
     test_query = "What did Rekt Capital say about Ethereum?"
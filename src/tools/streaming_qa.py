@@ -0,0 +1,58 @@
+from typing import Iterator, Tuple
+
+try:
+    from langchain_core.messages import SystemMessage, HumanMessage
+except Exception:
+    from langchain.schema import SystemMessage, HumanMessage
+
+# Same wording RetrievalQA's "stuff" chain uses for chat models, so streamed and
+# non-streamed answers read alike
+QA_SYSTEM_PROMPT = (
+    "Use the following pieces of context to answer the user's question. \n"
+    "If you don't know the answer, just say that you don't know, don't try to make up an answer.\n"
+    "----------------\n{context}"
+)
+
+def qa_messages(query: str, docs) -> list:
+    context = "\n\n".join(doc.page_content for doc in docs)
+    return [SystemMessage(content=QA_SYSTEM_PROMPT.format(context=context)), HumanMessage(content=query)]
+
+
+class StreamingQA:
+    """
+    Streaming counterpart of RetrievalQA(chain_type="stuff"). stream()
+    retrieves, then yields the answer as the LLM produces it. Results are
+    stored in the shared SemanticAnswerCache in RetrievalQA's output shape,
+    so cached answers from either path serve both.
+    """
+
+    def __init__(self, llm, retriever, embeddings, answer_cache):
+        self.llm = llm
+        self.retriever = retriever
+        self.embeddings = embeddings
+        self.answer_cache = answer_cache
+
+    def stream(self, query: str, scope=None) -> Iterator[Tuple[str, object]]:
+        """Yield ("token", text) pieces, then ("done", {"result", "source_documents"})."""
+        vector = self.embeddings.embed_query(query)
+        cached = self.answer_cache.lookup(vector, scope)
+        if cached is not None:
+            yield "token", cached["result"]
+            yield "done", cached
+            return
+
+        docs = self.retriever.invoke(query)
+        answer = ""
+        for chunk in self.llm.stream(qa_messages(query, docs)):
+            if chunk.content:
+                answer += chunk.content
+                yield "token", chunk.content
+        result = {"query": query, "result": answer, "source_documents": docs}
+        self.answer_cache.store(vector, result, scope)
+        yield "done", result
+
+    def invoke(self, query: str, scope=None) -> dict:
+        """Whole answer at once (drains stream())."""
+        for kind, value in self.stream(query, scope):
+            if kind == "done":
+                return value
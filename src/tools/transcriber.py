@@ -0,0 +1,181 @@
+import os
+import time
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+# Each worker process holds its own copy of the model weights
+VOICE_WORKERS = int(os.getenv("VOICE_WORKERS", "1"))
+# Requests allowed to wait for a worker; beyond this new voice messages are turned away
+VOICE_QUEUE_SIZE = int(os.getenv("VOICE_QUEUE_SIZE", "8"))
+TRANSCRIBE_TIMEOUT = float(os.getenv("TRANSCRIBE_TIMEOUT", "120"))
+# Recent requests kept for the timing stats
+TIMING_WINDOW = 100
+
+
+class TranscriberBusy(Exception):
+    """Every worker is busy and the wait queue is full."""
+
+# === WORKER PROCESS ===
+_model = None
+
+def _load_model(model_name: str):
+    """Pool initializer: load the weights once per worker process, not per request."""
+    global _model
+    import whisper
+    _model = whisper.load_model(model_name)
+
+def _warm() -> int:
+    return os.getpid()
+
+def _transcribe(file_path: str):
+    start = time.perf_counter()
+    text = _model.transcribe(file_path)["text"]
+    return text.strip(), time.perf_counter() - start
+
+# === POOL ===
+class Transcriber:
+    """
+    Whisper behind a small process pool. Workers load the model when they
+    start (warm() does that in the background at app startup), so a voice
+    message only pays for inference, and transcription never holds the GIL
+    of the process serving the UI. At most workers + queue_size requests are
+    admitted at once; the rest fail fast with TranscriberBusy.
+
+    Workers are spawned, never forked: the app forks from a multithreaded
+    process (Gradio, the market poller, httpx), which can deadlock a child
+    importing torch. Spawned workers re-import the launching script as
+    __mp_main__, so start the pool from under `if __name__ == "__main__":`.
+    """
+
+    def __init__(self, model_name=WHISPER_MODEL, workers=VOICE_WORKERS, queue_size=VOICE_QUEUE_SIZE,
+                 load_model=_load_model, transcribe=_transcribe):
+        self.workers = workers
+        self.model_name = model_name
+        self._load_model = load_model
+        self._transcribe = transcribe
+        self._warmed = False
+        self.pool = self._new_pool()
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self.in_flight = self.completed = self.rejected = self.failed = self.restarts = 0
+        self.timings = deque(maxlen=TIMING_WINDOW)   # (transcribe_seconds, queue_wait_seconds)
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=self._load_model,
+            initargs=(self.model_name,),
+        )
+
+    def warm(self):
+        """Start the workers (and their model loads) without waiting for them."""
+        self._warmed = True
+        for _ in range(self.workers):
+            self.pool.submit(_warm)
+        return self
+
+    def _restart_pool(self, broken: ProcessPoolExecutor):
+        """
+        A worker died (e.g. OOM on a long clip) and took the whole pool with it;
+        swap in a fresh one so later voice messages work again.
+        """
+        with self._lock:
+            if self.pool is not broken:
+                return   # another request already replaced it
+            self.pool = self._new_pool()
+            self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+        print("⚠ Whisper worker crashed; restarted the transcription pool")
+        if self._warmed:
+            self.warm()
+
+    def _submit(self, file_path: str):
+        """(pool, future) for one clip; a pool found broken is replaced and tried once more."""
+        pool = self.pool
+        try:
+            return pool, pool.submit(self._transcribe, file_path)
+        except BrokenProcessPool:
+            self._restart_pool(pool)
+            pool = self.pool
+            return pool, pool.submit(self._transcribe, file_path)
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.in_flight - self.workers)
+
+    def _finished(self, future):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def transcribe(self, file_path: str, timeout: float = TRANSCRIBE_TIMEOUT) -> str:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise TranscriberBusy(f"{self.in_flight} voice requests already in progress")
+        with self._lock:
+            self.in_flight += 1
+            depth = self.queue_depth
+        submitted = time.perf_counter()
+        try:
+            pool, future = self._submit(file_path)
+        except Exception:
+            # never reached a worker: give the slot straight back
+            with self._lock:
+                self.failed += 1
+            self._finished(None)
+            raise
+        # the slot is held until the worker is really done, even if we stop waiting
+        future.add_done_callback(self._finished)
+        try:
+            text, seconds = future.result(timeout=timeout)
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            if isinstance(e, BrokenProcessPool):
+                self._restart_pool(pool)
+            raise
+        wait = time.perf_counter() - submitted - seconds
+        with self._lock:
+            self.completed += 1
+            self.timings.append((seconds, wait))
+        print(f"🎙 Transcribed in {seconds:.2f}s (queued {wait:.2f}s behind {depth} requests)")
+        return text
+
+    def stats(self) -> dict:
+        with self._lock:
+            timings = list(self.timings)
+            stats = {
+                "workers": self.workers,
+                "in_flight": self.in_flight,
+                "queue_depth": self.queue_depth,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "failed": self.failed,
+                "restarts": self.restarts,
+            }
+        if timings:
+            seconds = sorted(t for t, _ in timings)
+            stats["transcribe_avg_s"] = round(sum(seconds) / len(seconds), 3)
+            stats["transcribe_p95_s"] = round(seconds[int(0.95 * (len(seconds) - 1))], 3)
+            stats["queue_wait_avg_s"] = round(sum(w for _, w in timings) / len(timings), 3)
+        return stats
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+_transcriber = None
+_transcriber_lock = threading.Lock()
+
+def get_transcriber() -> Transcriber:
+    """Process-wide transcriber (one pool, models loaded once)."""
+    global _transcriber
+    with _transcriber_lock:
+        if _transcriber is None:
+            _transcriber = Transcriber()
+        return _transcriber
@@ -0,0 +1,296 @@
+import os
+import json
+import uuid
+import pathlib
+from typing import List, Optional
+
+import numpy as np
+
+from tools.metadata_index import MetadataIndex
+
+try:
+    from langchain_core.documents import Document
+    from langchain_core.vectorstores import VectorStore
+except Exception:
+    from langchain.schema import Document
+    from langchain.vectorstores.base import VectorStore
+
+VECTORS_FILE = "vectors.npy"
+DOCS_FILE = "docs.jsonl"
+# Optional int8 scalar quantization: codes[i] * scales[i] ~= vectors[i]
+CODES_FILE = "codes_int8.npy"
+SCALES_FILE = "scales.npy"
+# Rows scored per matmul; keeps float16 -> float32 upcasts small
+SCORE_BLOCK_ROWS = 65536
+# Queries scored together in search_many; bounds the rows x queries score matrix
+QUERY_BLOCK = 256
+# int8 rows upcast per approximate-scoring block; small enough to stay cache-resident
+QUANT_BLOCK_ROWS = 1024
+# Approximate top (k x RERANK_FACTOR, at least RERANK_MIN) get an exact float re-rank
+RERANK_FACTOR = 8
+RERANK_MIN = 64
+
+def quantize_int8(matrix: np.ndarray):
+    """Symmetric per-row int8 scalar quantization -> (codes, scales)."""
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales = np.where(scales == 0, 1.0, scales).astype(np.float32)
+    codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales
+
+def recall_at_k(index, queries, k=10) -> float:
+    """Mean share of the exact top-k that the (quantized) search also returns."""
+    approx = index.search_many_rows(queries, k)
+    exact = index.search_many_rows(queries, k, exact=True)
+    hits = [len({r for r, _ in a} & {r for r, _ in e}) / max(len(e), 1) for a, e in zip(approx, exact)]
+    return float(np.mean(hits)) if hits else 0.0
+
+
+class NumpyVectorIndex(VectorStore):
+    """
+    In-process vector store: exact cosine search over one
+    contiguous, L2-normalised float32/float16 matrix that is memory-mapped
+    from disk. One matmul + argpartition per query, no server, no sqlite.
+
+    Layout of an index directory:
+        vectors.npy      N x D matrix, rows normalised
+        docs.jsonl       one {"id", "text", "metadata"} per row, same order
+        codes_int8.npy   optional N x D int8 codes + scales.npy (N float32)
+
+    With int8 codes, queries are scored against the codes (a quarter of the
+    bytes to page in and share between workers) and only the best few
+    candidates touch the float matrix for an exact re-rank.
+    quantized: None uses the codes when present, True requires them, False ignores them.
+
+    add_texts appends rows by rewriting the .npy files (their header holds
+    the row count) and re-mapping them: fine for incremental top-ups, but
+    bulk loads should go through build() / pipeline/export_vector_index.py.
+    """
+
+    def __init__(self, path, embedding_function=None, mmap=True, quantized=None):
+        self.path = pathlib.Path(path)
+        self.embedding_function = embedding_function
+        self.mmap = mmap
+        self.quantized = quantized
+        if quantized and not (self.path / CODES_FILE).exists():
+            raise FileNotFoundError(f"❌ No int8 codes in {self.path}; export with --quantize int8")
+        self._open_matrices()
+        self.ids, self.texts, self.metadatas = [], [], []
+        with open(self.path / DOCS_FILE, "r", encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                self.ids.append(row["id"])
+                self.texts.append(row["text"])
+                self.metadatas.append(row["metadata"])
+        # prebuilt by pipeline/export_vector_index.py, else built here from docs.jsonl
+        self.meta_index = MetadataIndex.load(self.path, self.metadatas)
+
+    def _open_matrices(self):
+        mode = "r" if self.mmap else None
+        self.vectors = np.load(self.path / VECTORS_FILE, mmap_mode=mode)
+        self.codes = self.scales = None
+        if (self.path / CODES_FILE).exists() and self.quantized is not False:
+            self.codes = np.load(self.path / CODES_FILE, mmap_mode=mode)
+            self.scales = np.load(self.path / SCALES_FILE)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def embeddings(self):
+        return self.embedding_function
+
+    # === BUILD ===
+    @classmethod
+    def build(cls, path, ids, vectors, texts, metadatas, dtype="float32", embedding_function=None, quantize=None):
+        """Write a new index directory from parallel lists and open it. quantize: None | "int8"."""
+        path = pathlib.Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1, norms)
+        np.save(path / VECTORS_FILE, matrix.astype(dtype))
+        if quantize == "int8":
+            codes, scales = quantize_int8(matrix)
+            np.save(path / CODES_FILE, codes)
+            np.save(path / SCALES_FILE, scales)
+        elif quantize:
+            raise ValueError(f"❌ Unknown quantization '{quantize}' (expected 'int8')")
+        with open(path / DOCS_FILE, "w", encoding="utf-8") as f:
+            for doc_id, text, meta in zip(ids, texts, metadatas):
+                f.write(json.dumps({"id": doc_id, "text": text, "metadata": meta or {}}, ensure_ascii=False))
+                f.write("\n")
+        MetadataIndex.build(metadatas).save(path)
+        return cls(path, embedding_function=embedding_function)
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, path=None, **kwargs):
+        texts = list(texts)
+        ids = ids or [str(i) for i in range(len(texts))]
+        metadatas = metadatas or [{} for _ in texts]
+        return cls.build(path, ids, embedding.embed_documents(texts), texts, metadatas,
+                         embedding_function=embedding, **kwargs)
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs) -> List[str]:
+        """Embed and append rows (vectors, int8 codes if the index has them, docs, metadata index)."""
+        if self.embedding_function is None:
+            raise ValueError("❌ NumpyVectorIndex.add_texts needs an embedding_function")
+        texts = list(texts)
+        if not texts:
+            return []
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        metadatas = [meta or {} for meta in (metadatas or [{} for _ in texts])]
+        matrix = np.asarray(self.embedding_function.embed_documents(texts), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1, norms)
+
+        has_codes = (self.path / CODES_FILE).exists()
+        vectors = np.concatenate([np.asarray(self.vectors), matrix.astype(self.vectors.dtype)])
+        if has_codes:
+            codes, scales = quantize_int8(matrix)
+            codes = np.concatenate([np.load(self.path / CODES_FILE), codes])
+            scales = np.concatenate([np.load(self.path / SCALES_FILE), scales])
+        # drop the memmaps before replacing the files under them (Windows refuses otherwise)
+        self.vectors = self.codes = self.scales = None
+        self._replace(VECTORS_FILE, vectors)
+        if has_codes:
+            self._replace(CODES_FILE, codes)
+            self._replace(SCALES_FILE, scales)
+        with open(self.path / DOCS_FILE, "a", encoding="utf-8") as f:
+            for doc_id, text, meta in zip(ids, texts, metadatas):
+                f.write(json.dumps({"id": doc_id, "text": text, "metadata": meta}, ensure_ascii=False))
+                f.write("\n")
+        self.ids.extend(ids)
+        self.texts.extend(texts)
+        self.metadatas.extend(metadatas)
+        self.meta_index = MetadataIndex.build(self.metadatas)
+        self.meta_index.save(self.path)
+        self._open_matrices()
+        return ids
+
+    def _replace(self, name: str, array: np.ndarray):
+        """Write next to the target and swap it in, so a crash never leaves a half-written file."""
+        tmp = self.path / f"{name}.tmp.npy"
+        np.save(tmp, array)
+        os.replace(tmp, self.path / name)
+
+    # === FILTERING ===
+    def candidate_rows(self, filter: Optional[dict]):
+        """
+        Row ids matching a structured filter (see MetadataIndex.candidates),
+        or None for "every row".
+        """
+        return self.meta_index.candidates(filter)
+
+    # === SEARCH ===
+    def _scores(self, query: np.ndarray, rows=None) -> np.ndarray:
+        """Cosine scores of the (candidate) rows; `query` is (D,) or (D, queries)."""
+        matrix = self.vectors if rows is None else self.vectors[rows]
+        if matrix.dtype == np.float32:
+            return matrix @ query
+        scores = np.empty((len(matrix),) + query.shape[1:], dtype=np.float32)
+        for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+            block = np.asarray(matrix[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+            scores[start:start + len(block)] = block @ query
+        return scores
+
+    @staticmethod
+    def _normalise(vector) -> np.ndarray:
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        return query / norm if norm else query
+
+    def _approx_scores(self, queries: np.ndarray, rows=None) -> np.ndarray:
+        """int8 estimate of _scores; `queries` is (D, queries)."""
+        codes = self.codes if rows is None else self.codes[rows]
+        scales = self.scales if rows is None else self.scales[rows]
+        scores = np.empty((len(codes), queries.shape[1]), dtype=np.float32)
+        # one reused upcast buffer: a fresh allocation per block costs more than the matmul
+        buf = np.empty((min(QUANT_BLOCK_ROWS, len(codes)), codes.shape[1]), dtype=np.float32)
+        for start in range(0, len(codes), QUANT_BLOCK_ROWS):
+            n = min(QUANT_BLOCK_ROWS, len(codes) - start)
+            np.copyto(buf[:n], codes[start:start + n], casting="unsafe")
+            scores[start:start + n] = buf[:n] @ queries
+        return scores * scales[:, None]
+
+    def _search_quantized(self, queries: np.ndarray, k, rows=None):
+        """Approximate top candidates from the codes, then exact float scores for those rows only."""
+        approx = self._approx_scores(queries.T, rows)
+        shortlist = min(max(k * RERANK_FACTOR, RERANK_MIN), len(approx))
+        if shortlist == 0:
+            return [[] for _ in range(len(queries))]
+        cand = np.argpartition(-approx, shortlist - 1, axis=0)[:shortlist]
+        results = []
+        for q in range(len(queries)):
+            # sorted rows keep the float-matrix reads sequential
+            cand_rows = np.sort(cand[:, q] if rows is None else rows[cand[:, q]])
+            exact = np.asarray(self.vectors[cand_rows], dtype=np.float32) @ queries[q]
+            top = np.argsort(-exact)[:k]
+            results.append([(int(r), float(s)) for r, s in zip(cand_rows[top], exact[top])])
+        return results
+
+    def search_rows(self, vector, k=4, filter=None, exact=False):
+        """Return [(row, cosine score)] of the k best rows, best first."""
+        rows = self.candidate_rows(filter)
+        if rows is not None and len(rows) == 0:
+            return []
+        if self.codes is not None and not exact:
+            return self._search_quantized(self._normalise(vector)[None, :], k, rows)[0]
+        scores = self._scores(self._normalise(vector), rows)
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        picked = top if rows is None else rows[top]
+        return [(int(r), float(s)) for r, s in zip(picked, scores[top])]
+
+    def search_many_rows(self, vectors, k=4, filter=None, exact=False):
+        """
+        search_rows for many queries at once: the candidate matrix is read once
+        per QUERY_BLOCK queries and scored with one (rows x D) @ (D x queries)
+        matmul. Returns one [(row, score)] list per query vector.
+        """
+        queries = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+        rows = self.candidate_rows(filter)
+        if rows is not None and len(rows) == 0:
+            return [[] for _ in range(len(queries))]
+        results = []
+        for start in range(0, len(queries), QUERY_BLOCK):
+            if self.codes is not None and not exact:
+                results.extend(self._search_quantized(queries[start:start + QUERY_BLOCK], k, rows))
+                continue
+            scores = self._scores(queries[start:start + QUERY_BLOCK].T, rows)
+            kk = min(k, scores.shape[0])
+            if kk == 0:
+                results.extend([] for _ in range(scores.shape[1]))
+                continue
+            top = np.argpartition(-scores, kk - 1, axis=0)[:kk]
+            for q in range(scores.shape[1]):
+                col = top[:, q][np.argsort(-scores[top[:, q], q])]
+                picked = col if rows is None else rows[col]
+                results.append([(int(r), float(s)) for r, s in zip(picked, scores[col, q])])
+        return results
+
+    def similarity_search_many_by_vector(self, embeddings, k=4, filter=None) -> List[List[Document]]:
+        return [[self._document(r) for r, _ in hits] for hits in self.search_many_rows(embeddings, k, filter)]
+
+    def _document(self, row) -> Document:
+        # same metadata as the Chroma backend returns: no extra keys
+        return Document(page_content=self.texts[row], metadata=dict(self.metadatas[row]))
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, filter=None, **kwargs):
+        return [(self._document(r), s) for r, s in self.search_rows(embedding, k, filter)]
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter)]
+
+    def similarity_search_with_score(self, query, k=4, filter=None, **kwargs):
+        return self.similarity_search_with_score_by_vector(self.embedding_function.embed_query(query), k, filter)
+
+    def similarity_search(self, query, k=4, filter=None, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: score
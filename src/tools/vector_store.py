@@ -0,0 +1,28 @@
+import os
+import pathlib
+
+# File path here is .../src/tools/vector_store.py
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+
+# "chroma" (default) or "numpy" (in-process exact search, see tools/vector_index.py)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma").lower()
+CHROMA_DIR = os.getenv("CHROMA_DIR", str(REPO_ROOT / "chroma_store"))
+NUMPY_INDEX_DIR = os.getenv("NUMPY_INDEX_DIR", str(REPO_ROOT / "vector_index"))
+# NumPy backend only: "auto" scores int8 codes when the index has them, "int8" requires them, "none" ignores them
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "auto").lower()
+_QUANTIZED = {"auto": None, "int8": True, "none": False}
+
+def get_vectorstore(embedding, backend=None, chroma_dir=None, index_dir=None):
+    """
+    Build the configured vector store. Both backends expose the same
+    similarity_search / similarity_search_by_vector / as_retriever surface.
+    """
+    backend = (backend or VECTOR_BACKEND).lower()
+    if backend == "numpy":
+        from tools.vector_index import NumpyVectorIndex
+        return NumpyVectorIndex(index_dir or NUMPY_INDEX_DIR, embedding_function=embedding,
+                                quantized=_QUANTIZED.get(VECTOR_QUANTIZATION))
+    if backend == "chroma":
+        from langchain_community.vectorstores import Chroma
+        return Chroma(persist_directory=chroma_dir or CHROMA_DIR, embedding_function=embedding)
+    raise ValueError(f"❌ Unknown VECTOR_BACKEND '{backend}' (expected 'chroma' or 'numpy')")
@@ -0,0 +1,102 @@
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+from app import api
+from tools import market_poller
+
+
+def test_identical_questions_share_one_answer(monkeypatch):
+    calls = []
+
+    def slow_answer(query):
+        calls.append(query)
+        time.sleep(0.3)
+        return f"answer to {query}"
+
+    monkeypatch.setattr(api, "answer", slow_answer)
+    questions = ["ARB price", "  ARB   price "] * 3 + ["arb price"]
+    with TestClient(api.app) as client, ThreadPoolExecutor(len(questions)) as pool:
+        responses = list(pool.map(lambda q: client.post("/ask", json={"query": q}), questions))
+
+    # whichever spacing arrives first is the one computed; the rest share its answer
+    collapse = lambda text: " ".join(text.split())
+    assert all(r.status_code == 200 for r in responses)
+    # case is kept: "arb price" routes differently, so it gets its own answer
+    assert sorted(map(collapse, calls)) == ["ARB price", "arb price"]
+    assert responses[-1].json()["answer"] == "answer to arb price"
+    assert all(collapse(r.json()["answer"]) == "answer to ARB price" for r in responses[:-1])
+
+
+def test_endpoint_limit_queues_then_rejects(monkeypatch):
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def slow_price(query):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.2)
+        with lock:
+            running[0] -= 1
+        return query
+
+    monkeypatch.setattr(api, "price", slow_price)
+    monkeypatch.setitem(api.limits, "price", api.EndpointLimit("price", limit=2, queue_timeout=0.3))
+    with TestClient(api.app) as client, ThreadPoolExecutor(8) as pool:
+        responses = list(pool.map(lambda i: client.get("/price", params={"q": f"btc {i}"}), range(8)))
+
+    codes = sorted(r.status_code for r in responses)
+    assert peak[0] == 2
+    assert 200 in codes and 503 in codes
+
+
+def test_retrieve_rejects_unknown_mode(monkeypatch):
+    monkeypatch.setattr(api, "retrieve", lambda query, k, mode, filters: f"{mode}:{query}")
+    with TestClient(api.app) as client:
+        assert client.post("/retrieve", json={"query": "eth", "mode": "dense"}).status_code == 422
+        response = client.post("/retrieve", json={"query": "eth", "mode": "bm25"})
+    assert response.json()["context"] == "bm25:eth"
+
+
+def test_retrieve_validates_k_and_filters(monkeypatch):
+    seen = []
+    monkeypatch.setattr(api, "retrieve", lambda query, k, mode, filters: seen.append((k, filters)) or query)
+    bad = [
+        {"query": "eth", "k": 0},
+        {"query": "eth", "k": 500},
+        {"query": "eth", "filters": {"sorce": "reddit"}},
+        {"query": "eth", "filters": {"date_from": "last week"}},
+    ]
+    with TestClient(api.app) as client:
+        assert [client.post("/retrieve", json=body).status_code for body in bad] == [422] * 4
+        response = client.post("/retrieve", json={
+            "query": "eth", "k": 8,
+            "filters": {"source": "reddit", "coin": ["ethereum"], "date_from": "2025-01-01", "date_to": 1767225600},
+        })
+
+    assert response.status_code == 200
+    assert seen == [(8, {"source": "reddit", "coin": ["ethereum"],
+                         "date_from": "2025-01-01T00:00:00", "date_to": "2026-01-01T00:00:00Z"})]
+
+
+def test_market_poller_runs_for_the_app_lifetime(monkeypatch):
+    events = []
+
+    class FakePoller:
+        def stop(self):
+            events.append("stop")
+
+    def start():
+        events.append("start")
+        return FakePoller()
+
+    monkeypatch.setattr(market_poller, "start_market_poller_if_enabled", start)
+    with TestClient(api.app) as client:
+        # started before any /ask imported the query pipeline
+        assert events == ["start"]
+        assert client.get("/health").status_code == 200
+    assert events == ["start", "stop"]
@@ -0,0 +1,24 @@
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from pipeline.dedup import MinHashDeduper
+
+BASE = (
+    "Bitcoin miners are under pressure after the halving, and on-chain data shows "
+    "reserves leaving miner wallets at the fastest pace since the last cycle bottom."
+)
+
+
+def test_drops_exact_and_near_duplicates():
+    deduper = MinHashDeduper(threshold=0.8)
+    items = [
+        ("a", BASE),
+        ("b", BASE),
+        ("c", BASE + " Thanks for reading."),
+        ("d", "Ethereum blob fees collapsed after EIP-4844 shipped to mainnet."),
+    ]
+    kept = [key for key, _ in deduper.filter(items, text=lambda item: item[1])]
+
+    assert kept == ["a", "d"]
+    assert [d["duplicate_of"] for d in deduper.dropped] == ["a", "a"]
+    assert deduper.report()["dropped_count"] == 2
@@ -0,0 +1,63 @@
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import time
+
+import pytest
+
+from tools.fanout import stream_branch, run_branches, BranchTimeout
+
+
+def producer(produced, closed, delay=0.05):
+    def produce():
+        try:
+            for i in range(1000):
+                time.sleep(delay)
+                produced.append(i)
+                yield i
+        finally:
+            closed.append(True)
+    return produce
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_closing_the_stream_stops_the_producer():
+    produced, closed = [], []
+    stream = stream_branch(producer(produced, closed), "analysis", timeout=5)
+    assert [next(stream), next(stream)] == [0, 1]
+    stream.close()
+
+    assert wait_for(lambda: closed)
+    count = len(produced)
+    time.sleep(0.2)
+    assert len(produced) == count
+
+
+def test_timeout_stops_the_producer():
+    produced, closed = [], []
+    stream = stream_branch(producer(produced, closed), "analysis", timeout=0.2)
+    with pytest.raises(BranchTimeout):
+        list(stream)
+    assert wait_for(lambda: closed)
+
+
+def test_unread_stream_is_stopped_when_dropped():
+    produced, closed = [], []
+    stream_branch(producer(produced, closed, delay=0.01), "analysis", timeout=5)
+    assert wait_for(lambda: closed)
+    assert len(produced) < 1000
+
+
+def test_run_branches_bounds_each_branch():
+    results = run_branches(
+        {"fast": lambda: "ok", "slow": lambda: time.sleep(0.5), "boom": lambda: 1 / 0},
+        {"fast": 1, "slow": 0.1, "boom": 1},
+    )
+    assert results["fast"] == "ok"
+    assert isinstance(results["slow"], BranchTimeout)
+    assert isinstance(results["boom"], ZeroDivisionError)
@@ -0,0 +1,90 @@
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from tools import http_client
+from tools.http_client import HttpClient, TokenBucket, RateLimitTimeout
+
+
+class StubCoinGecko(BaseHTTPRequestHandler):
+    """Answers /simple/price; the first `fail_first` calls get a 429."""
+
+    protocol_version = "HTTP/1.1"
+    fail_first = 0
+    calls = 0
+    connections = set()
+
+    def do_GET(self):
+        cls = type(self)
+        cls.calls += 1
+        cls.connections.add(self.client_address)
+        if cls.calls <= cls.fail_first:
+            body, status = b"{}", 429
+        else:
+            body, status = json.dumps({"bitcoin": {"usd": 64000.0}}).encode(), 200
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    StubCoinGecko.calls, StubCoinGecko.fail_first, StubCoinGecko.connections = 0, 0, set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubCoinGecko)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(http_client, "BACKOFF_BASE", 0.01)
+    yield f"http://127.0.0.1:{server.server_port}/api/v3"
+    server.shutdown()
+
+
+def test_retries_429_then_succeeds(stub_server):
+    StubCoinGecko.fail_first = 2
+    client = HttpClient(stub_server, rate_per_min=6000, burst=10)
+
+    data = client.get_json("/simple/price", params={"ids": "bitcoin", "vs_currencies": "usd"})
+
+    assert data["bitcoin"]["usd"] == 64000.0
+    assert StubCoinGecko.calls == 3
+    assert client.retries == 2
+
+
+def test_reuses_keepalive_connection(stub_server):
+    client = HttpClient(stub_server, rate_per_min=6000, burst=10)
+    for _ in range(5):
+        client.get_json("/simple/price")
+
+    assert StubCoinGecko.calls == 5
+    assert len(StubCoinGecko.connections) == 1
+
+
+def test_token_bucket_queues_then_times_out():
+    bucket = TokenBucket(rate=20, capacity=1)
+    bucket.acquire()
+    bucket.acquire(timeout=1)  # waits ~50 ms for the next token instead of failing
+
+    slow = TokenBucket(rate=0.1, capacity=1)
+    slow.acquire()
+    with pytest.raises(RateLimitTimeout):
+        slow.acquire(timeout=0.1)
+
+
+def test_coingecko_budget_is_split_between_workers(monkeypatch):
+    monkeypatch.setattr(http_client, "_clients", {})
+    monkeypatch.setattr(http_client, "COINGECKO_RATE_PER_MIN", 30.0)
+    monkeypatch.setattr(http_client, "COINGECKO_BURST", 5)
+    monkeypatch.setattr(http_client, "COINGECKO_RATE_SHARE", 4)
+
+    client = http_client.get_coingecko_client()
+
+    assert client.bucket.rate * 60 == pytest.approx(7.5)
+    assert client.bucket.capacity == 1
+    client.close()
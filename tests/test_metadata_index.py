@@ -0,0 +1,44 @@
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+from datetime import datetime, timezone
+
+import pytest
+
+from tools.metadata_index import MetadataIndex, matches, parse_date
+
+def epoch(day: str) -> float:
+    return datetime.fromisoformat(day).replace(tzinfo=timezone.utc).timestamp()
+
+# Articles/transcripts carry ISO dates; Reddit stores created_utc epoch seconds
+METADATAS = [
+    {"source": "substack", "date": "2024-03-01"},
+    {"source": "reddit", "subreddit": "ethfinance", "date": epoch("2024-06-01")},
+    {"source": "reddit", "subreddit": "bitcoin", "date": epoch("2023-11-15")},
+    {"source": "youtube", "ingest_date": "2024-05-20T10:00:00Z"},
+    {"source": "reddit", "date": str(int(epoch("2024-02-10")))},
+]
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024-06-01", epoch("2024-06-01")),
+    (epoch("2024-06-01"), epoch("2024-06-01")),
+    (int(epoch("2024-06-01")), epoch("2024-06-01")),
+    ("1717200000.0", 1717200000.0),
+    ("not a date", None),
+    (None, None),
+])
+def test_parse_date_accepts_iso_and_epoch(value, expected):
+    assert parse_date(value) == expected
+
+
+@pytest.mark.parametrize("filters, rows", [
+    ({"source": "reddit", "date_from": "2024-01-01"}, [1, 4]),
+    ({"date_from": "2024-01-01", "date_to": "2024-05-31"}, [0, 3, 4]),
+    ({"subreddit": "bitcoin", "date_to": "2024-01-01"}, [2]),
+    ({"source": "reddit", "date_from": "2025-01-01"}, []),
+])
+def test_date_ranges_cover_iso_and_epoch_rows(filters, rows):
+    index = MetadataIndex.build(METADATAS)
+    assert list(index.candidates(filters)) == rows
+    # the Chroma post-filter agrees with the index
+    assert [r for r, meta in enumerate(METADATAS) if matches(meta, filters)] == rows
@@ -0,0 +1,83 @@
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tools.price_service import PriceService, PriceUnavailable
+
+
+class FakeCoinGecko:
+    """Injected `fetch`: answers in the /simple/price shape and records every call."""
+
+    def __init__(self, price=64000.0):
+        self.price = price
+        self.calls = []
+        self.fail = False
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, ids, currencies):
+        self.calls.append((list(ids), list(currencies)))
+        self.release.wait(5)
+        if self.fail:
+            raise ConnectionError("CoinGecko is down")
+        return {coin: {**{cur: self.price for cur in currencies},
+                       **{f"{cur}_24h_change": 1.5 for cur in currencies}} for coin in ids}
+
+
+def age(service, seconds):
+    """Pretend every cached quote was fetched `seconds` earlier."""
+    for quote in service._quotes.values():
+        quote["fetched_at"] -= seconds
+
+
+def test_concurrent_lookups_share_one_fetch():
+    fetch = FakeCoinGecko()
+    fetch.release.clear()
+    service = PriceService(fetch=fetch, ttl=30, stale_ttl=600)
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(service.get_quote, "Bitcoin", "USD") for _ in range(8)]
+        deadline = time.monotonic() + 5
+        while service.coalesced < 7 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        fetch.release.set()
+        quotes = [f.result() for f in futures]
+
+    assert fetch.calls == [(["bitcoin"], ["usd"])]
+    assert all(q["price"] == 64000.0 and not q["stale"] for q in quotes)
+    assert (service.misses, service.coalesced) == (1, 7)
+
+
+def test_cached_quote_is_served_within_ttl():
+    fetch = FakeCoinGecko()
+    service = PriceService(fetch=fetch, ttl=30, stale_ttl=600)
+
+    first = service.get_quote("ethereum")
+    age(service, 20)
+    fetch.price = 1.0
+    assert service.get_quote("ethereum")["price"] == first["price"]
+    assert len(fetch.calls) == 1 and service.hits == 1
+
+    age(service, 20)
+    assert service.get_quote("ethereum")["price"] == 1.0
+    assert len(fetch.calls) == 2
+
+
+def test_failed_fetch_serves_stale_quote_then_gives_up():
+    fetch = FakeCoinGecko()
+    service = PriceService(fetch=fetch, ttl=30, stale_ttl=600)
+    service.get_quote("solana")
+
+    fetch.fail = True
+    age(service, 60)
+    stale = service.get_quote("solana")
+    assert stale["stale"] is True and stale["price"] == 64000.0
+    assert service.stale_served == 1
+
+    age(service, 600)
+    with pytest.raises(PriceUnavailable):
+        service.get_quote("solana")
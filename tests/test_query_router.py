@@ -0,0 +1,55 @@
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+
+from tools.query_router import QueryRouter
+
+# Stand-in for COIN_MAP: a few real coins plus tokens whose tickers collide with words and acronyms
+COIN_MAP = {
+    "bitcoin": "bitcoin", "btc": "bitcoin",
+    "ethereum": "ethereum", "eth": "ethereum",
+    "solana": "solana", "sol": "solana",
+    "shiba inu": "shiba-inu", "shib": "shiba-inu",
+    "arbitrum": "arbitrum", "arb": "arb-bridge-token",
+    "sec": "sec-token", "etf": "etf-token", "ai": "sleepless-ai", "nft": "apenft",
+    "the": "the-token", "is": "is-token", "usd": "usd-token",
+}
+
+
+@pytest.fixture(scope="module")
+def router():
+    return QueryRouter(COIN_MAP)
+
+
+@pytest.mark.parametrize("query, intent, coins", [
+    ("What do analysts say about the SEC ETF decision?", "analysis", []),
+    ("Is AI the next NFT thing?", "analysis", []),
+    ("WHAT IS THE BITCOIN PRICE", "price", ["bitcoin"]),
+    ("Any solution for high gas fees?", "analysis", []),
+    ("shiba inu price", "price", ["shiba-inu"]),
+    ("ARB price", "price", ["arbitrum"]),
+    ("arb price", "price", []),
+    ("price of $SEC", "price", ["sec-token"]),
+    ("Can you share a link to the Coin Bureau video on ethereum?", "hybrid", ["ethereum"]),
+    ("what did they say about the dot com bubble", "analysis", []),
+    ("LINK and DOT price", "price", ["chainlink", "polkadot"]),
+])
+def test_route_coins_and_intent(router, query, intent, coins):
+    route = router.route(query)
+    assert route.intent == intent
+    assert route.coins == coins
+
+
+def test_multi_coin_multi_currency(router):
+    route = router.route("Compare BTC, ETH and SOL in EUR and £")
+    assert route.intent == "price"
+    assert route.coins == ["bitcoin", "ethereum", "solana"]
+    assert route.currencies == ["eur", "gbp"]
+
+
+def test_bare_coin_is_hybrid_and_defaults_to_usd(router):
+    route = router.route("thoughts on solana?")
+    assert route.intent == "hybrid"
+    assert route.coins == ["solana"]
+    assert route.currencies == ["usd"]
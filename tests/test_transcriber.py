@@ -0,0 +1,83 @@
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+import time
+import threading
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from tools.transcriber import Transcriber, TranscriberBusy
+
+
+# Stand-ins for the Whisper worker functions; module-level so spawned workers can import them
+def fake_load_model(model_name):
+    pass
+
+def fake_transcribe(file_path):
+    time.sleep(0.5)
+    return f"text of {file_path}", 0.5
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.fixture
+def transcriber():
+    t = Transcriber(workers=1, queue_size=1, load_model=fake_load_model, transcribe=fake_transcribe)
+    t.pool.submit(time.time).result(timeout=30)  # worker spawned and ready
+    yield t
+    t.close()
+
+
+def test_admits_workers_plus_queue_and_rejects_the_rest(transcriber):
+    results = []
+
+    def voice(i):
+        try:
+            results.append(transcriber.transcribe(f"clip{i}.wav"))
+        except TranscriberBusy:
+            results.append("busy")
+
+    threads = [threading.Thread(target=voice, args=(i,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    assert wait_for(lambda: transcriber.in_flight == 2)
+    assert transcriber.queue_depth == 1
+
+    for i in range(2, 4):
+        voice(i)   # slots are full: turned away immediately
+    for thread in threads:
+        thread.join()
+
+    assert results.count("busy") == 2
+    assert sorted(r for r in results if r != "busy") == ["text of clip0.wav", "text of clip1.wav"]
+    stats = transcriber.stats()
+    assert (stats["completed"], stats["rejected"], stats["failed"]) == (2, 2, 0)
+    assert (stats["in_flight"], stats["queue_depth"]) == (0, 0)
+    assert stats["transcribe_avg_s"] == 0.5
+    assert stats["queue_wait_avg_s"] > 0
+
+
+def crash_on_request(file_path):
+    if file_path == "crash.wav":
+        os._exit(1)   # what an OOM-killed worker looks like to the pool
+    return f"text of {file_path}", 0.01
+
+
+def test_recovers_after_worker_crash():
+    t = Transcriber(workers=1, queue_size=1, load_model=fake_load_model, transcribe=crash_on_request)
+    try:
+        for _ in range(3):
+            with pytest.raises(BrokenProcessPool):
+                t.transcribe("crash.wav")
+        assert t.transcribe("ok.wav") == "text of ok.wav"
+
+        stats = t.stats()
+        assert (stats["in_flight"], stats["completed"], stats["failed"]) == (0, 1, 3)
+        assert stats["restarts"] == 3
+    finally:
+        t.close()